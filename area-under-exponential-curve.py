@@ -1,42 +1,75 @@
+import argparse
+
 import numpy as np
-import matplotlib.pyplot as plt
+
+import monte_carlo
+import quasi_random
+
+parser = argparse.ArgumentParser(description="Monte Carlo estimate of the area under y = 2e^x")
+parser.add_argument(
+    "--terminal",
+    action="store_true",
+    help="draw the plot as text with asciiRendering/plot.py, without matplotlib, for headless runs",
+)
+parser.add_argument(
+    "--sampler",
+    choices=quasi_random.SEQUENCES,
+    help="randomized quasi-Monte Carlo with this low-discrepancy sequence instead of pseudo-random points",
+)
+args = parser.parse_args()
+if args.terminal:
+    from asciiRendering import plot as ascii_plot
+else:
+    import matplotlib.pyplot as plt
 
 def f(x):
     return 2 * np.exp(x)
 
-def monte_carlo_integration(num_points=100000, x_max=10):
+def monte_carlo_integration(num_points=100000, x_max=10, plot_points=20000, seed=None, sampler=None):
     # Reduce x_max to a manageable range
     x_min, y_min = 0, f(0)
     y_max = f(x_max)
 
-    # Generate random points
-    x = np.random.uniform(x_min, x_max, num_points)
-    y = np.random.uniform(y_min, y_max, num_points)
+    # Points are streamed in chunks, so memory does not grow with num_points;
+    # only a uniform sample of plot_points of them is kept for the plot
+    box = monte_carlo.Box([x_min, y_min], [x_max, y_max])
+    if sampler is None:
+        result = monte_carlo.area(lambda x, y: y <= f(x), box, num_points, seed=seed, reservoir=plot_points)
+        x, y = result["points"]
+        points_under_curve = result["values"] > 0
+        return result["estimate"], points_under_curve, x, y
 
-    # Count points under the curve
-    points_under_curve = y <= f(x)
-    
-    # Calculate area
-    total_area = (x_max - x_min) * (y_max - y_min)
-    area_under_curve = total_area * np.sum(points_under_curve) / num_points
-
-    return area_under_curve, points_under_curve, x, y
+    # sampler is "sobol", "halton" or "r2": randomized quasi-Monte Carlo, and
+    # the plot shows the first plot_points of the plain sequence
+    result = monte_carlo.quasi_monte_carlo(lambda x, y: y <= f(x), box, num_points, seed=seed, sequence=sampler)
+    x, y = box.sample(quasi_random.SEQUENCES[sampler](2), plot_points)
+    return result["estimate"], y <= f(x), x, y
 
 # Perform integration
-result, points_under_curve, x, y = monte_carlo_integration()
+result, points_under_curve, x, y = monte_carlo_integration(sampler=args.sampler)
 
 # Visualization
-plt.figure(figsize=(10, 6))
-plt.scatter(x[points_under_curve], y[points_under_curve], c='blue', alpha=0.1, label='Points under curve')
-plt.scatter(x[~points_under_curve], y[~points_under_curve], c='red', alpha=0.1, label='Points above curve')
-
 x_curve = np.linspace(0, 10, 1000)
-plt.plot(x_curve, f(x_curve), 'g-', label='y = 2e^x')
-plt.title(f'Monte Carlo Integration: Area = {result:.2f}')
-plt.xlabel('x')
-plt.ylabel('y')
-plt.legend()
-plt.show()
+if args.terminal:
+    # Only the points under the curve are shaded; the rest of the box is above it
+    fig = ascii_plot.TerminalPlot(100, 30)
+    fig.scatter(x[points_under_curve], y[points_under_curve], label='Points under curve')
+    fig.plot(x_curve, f(x_curve), char='#', label='y = 2e^x')
+    fig.title(f'Monte Carlo Integration: Area = {result:.2f}')
+    fig.xlabel('x')
+    fig.ylabel('y')
+    fig.show()
+else:
+    plt.figure(figsize=(10, 6))
+    plt.scatter(x[points_under_curve], y[points_under_curve], c='blue', alpha=0.1, label='Points under curve')
+    plt.scatter(x[~points_under_curve], y[~points_under_curve], c='red', alpha=0.1, label='Points above curve')
+
+    plt.plot(x_curve, f(x_curve), 'g-', label='y = 2e^x')
+    plt.title(f'Monte Carlo Integration: Area = {result:.2f}')
+    plt.xlabel('x')
+    plt.ylabel('y')
+    plt.legend()
+    plt.show()
 
 print(f"Estimated Area: {result:.2f}")
 
@@ -1,5 +1,12 @@
+import argparse
+import io
 import math
+import sys
 import time
+from collections import deque
+from functools import lru_cache
+
+import numpy as np
 
 
 class ASCIIRenderer:
@@ -17,16 +24,24 @@ class ASCIIRenderer:
     def __init__(self, width, height):
         self.width = width
         self.height = height
-        self.buffer = [[" " for _ in range(width)] for _ in range(height)]
+        # Code points, indexed [y, x]; little-endian so render() can decode in one pass
+        self.buffer = np.full((height, width), ord(" "), dtype="<u4")
 
     def clear(self):
         """Clear the buffer"""
-        self.buffer = [[" " for _ in range(self.width)] for _ in range(self.height)]
+        self.buffer.fill(ord(" "))
 
     def draw_pixel(self, x, y, char="█"):
         """Draw a single character at specified coordinates"""
         if 0 <= x < self.width and 0 <= y < self.height:
-            self.buffer[y][x] = char
+            self.buffer[y, x] = ord(char)
+
+    def _fill_rect(self, x1, y1, x2, y2, char):
+        """Fill the half-open rectangle [x1, x2) x [y1, y2), clipped to the buffer"""
+        x1, x2 = max(x1, 0), min(x2, self.width)
+        y1, y2 = max(y1, 0), min(y2, self.height)
+        if x1 < x2 and y1 < y2:
+            self.buffer[y1:y2, x1:x2] = ord(char)
 
     def draw_line(self, x1, y1, x2, y2, char="█"):
         """Draw a line using Bresenham's algorithm"""
@@ -56,6 +71,46 @@ class ASCIIRenderer:
                 y += sy
         self.draw_pixel(x, y, char)
 
+    def _plot(self, xs, ys, char):
+        """Set every in-bounds (x, y) pair to char"""
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        self.buffer[ys[inside], xs[inside]] = ord(char)
+
+    def _fill_spans(self, ys, x_starts, x_ends, char):
+        """Fill the inclusive spans [x_start, x_end] on row y, clipped once for the whole batch"""
+        ys = np.asarray(ys, dtype=np.int64)
+        x_starts = np.maximum(np.asarray(x_starts, dtype=np.int64), 0)
+        x_ends = np.minimum(np.asarray(x_ends, dtype=np.int64), self.width - 1)
+        keep = (ys >= 0) & (ys < self.height) & (x_starts <= x_ends)
+        ys, x_starts, x_ends = ys[keep], x_starts[keep], x_ends[keep]
+        lengths = x_ends - x_starts + 1
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        self.buffer[np.repeat(ys, lengths), np.repeat(x_starts, lengths) + offsets] = ord(char)
+
+    def draw_lines(self, x1s, y1s, x2s, y2s, char="█"):
+        """Draw many lines at once; pixel for pixel the same as draw_line on each.
+
+        Point k of a line that steps along its major axis has moved
+        ceil((2*k*minor - major) / (2*major)) cells along the minor axis,
+        which is where draw_line's error term crosses zero.
+        """
+        x1s, y1s, x2s, y2s = (np.atleast_1d(np.asarray(a, dtype=np.int64)) for a in (x1s, y1s, x2s, y2s))
+        dx, dy = np.abs(x2s - x1s), np.abs(y2s - y1s)
+        sx = np.where(x1s < x2s, 1, -1)
+        sy = np.where(y1s < y2s, 1, -1)
+        major = np.maximum(dx, dy)
+        minor = np.minimum(dx, dy)
+        counts = major + 1
+        line = np.repeat(np.arange(len(x1s)), counts)
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        major, minor = major[line], minor[line]
+        steps = -((major - 2 * k * minor) // (2 * np.maximum(major, 1)))
+        x_major = (dx > dy)[line]
+        xs = x1s[line] + sx[line] * np.where(x_major, k, steps)
+        ys = y1s[line] + sy[line] * np.where(x_major, steps, k)
+        self._plot(xs, ys, char)
+
     def draw_box(self, x, y, width, height):
         """Draw a box using box-drawing characters"""
         # Draw corners
@@ -65,48 +120,665 @@ class ASCIIRenderer:
         self.draw_pixel(x + width - 1, y + height - 1, self.BOX_CHARS["bottom_right"])
 
         # Draw edges
-        for i in range(1, width - 1):
-            self.draw_pixel(x + i, y, self.BOX_CHARS["horizontal"])
-            self.draw_pixel(x + i, y + height - 1, self.BOX_CHARS["horizontal"])
+        for row in (y, y + height - 1):
+            self._fill_rect(x + 1, row, x + width - 1, row + 1, self.BOX_CHARS["horizontal"])
+        for col in (x, x + width - 1):
+            self._fill_rect(col, y + 1, col + 1, y + height - 1, self.BOX_CHARS["vertical"])
 
-        for i in range(1, height - 1):
-            self.draw_pixel(x, y + i, self.BOX_CHARS["vertical"])
-            self.draw_pixel(x + width - 1, y + i, self.BOX_CHARS["vertical"])
-
-    def draw_circle(self, center_x, center_y, radius):
+    def draw_circle(self, center_x, center_y, radius, char="█"):
         """Draw a circle using midpoint circle algorithm"""
         x = radius
         y = 0
         err = 0
 
         while x >= y:
-            self.draw_pixel(center_x + x, center_y + y)
-            self.draw_pixel(center_x + y, center_y + x)
-            self.draw_pixel(center_x - y, center_y + x)
-            self.draw_pixel(center_x - x, center_y + y)
-            self.draw_pixel(center_x - x, center_y - y)
-            self.draw_pixel(center_x - y, center_y - x)
-            self.draw_pixel(center_x + y, center_y - x)
-            self.draw_pixel(center_x + x, center_y - y)
+            self.draw_pixel(center_x + x, center_y + y, char)
+            self.draw_pixel(center_x + y, center_y + x, char)
+            self.draw_pixel(center_x - y, center_y + x, char)
+            self.draw_pixel(center_x - x, center_y + y, char)
+            self.draw_pixel(center_x - x, center_y - y, char)
+            self.draw_pixel(center_x - y, center_y - x, char)
+            self.draw_pixel(center_x + y, center_y - x, char)
+            self.draw_pixel(center_x + x, center_y - y, char)
+
+            y += 1
+            err += 1 + 2 * y
+            if 2 * (err - x) + 1 > 0:
+                x -= 1
+                err += 1 - 2 * x
 
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _circle_offsets(radius):
+        """Outline offsets that draw_circle plots for radius, as (dx, dy) arrays"""
+        octant = []
+        x, y, err = radius, 0, 0
+        while x >= y:
+            octant.append((x, y))
             y += 1
             err += 1 + 2 * y
             if 2 * (err - x) + 1 > 0:
                 x -= 1
                 err += 1 - 2 * x
+        octant = np.array(octant, dtype=np.int64).reshape(-1, 2)
+        a, b = octant[:, 0], octant[:, 1]
+        dxs = np.concatenate((a, b, -b, -a, -a, -b, b, a))
+        dys = np.concatenate((b, a, a, b, -b, -a, -a, -b))
+        return dxs, dys
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _circle_spans(radius):
+        """(row offsets, half widths) of the filled circle: each row spans its outline extremes"""
+        dxs, dys = ASCIIRenderer._circle_offsets(radius)
+        if not len(dys):
+            return dys, dxs
+        rows = np.arange(-radius, radius + 1)
+        half = np.zeros(len(rows), dtype=np.int64)
+        np.maximum.at(half, dys + radius, np.abs(dxs))
+        return rows, half
+
+    def draw_circles(self, center_xs, center_ys, radii, char="█"):
+        """Draw many circle outlines at once; the same pixels as draw_circle on each"""
+        center_xs, center_ys, radii = (np.atleast_1d(np.asarray(a, dtype=np.int64)) for a in (center_xs, center_ys, radii))
+        for radius in np.unique(radii):
+            dxs, dys = self._circle_offsets(int(radius))
+            mine = radii == radius
+            self._plot(
+                (center_xs[mine, None] + dxs).ravel(), (center_ys[mine, None] + dys).ravel(), char
+            )
+
+    def fill_circle(self, center_x, center_y, radius, char="█"):
+        """Draw a filled circle whose edge is the draw_circle outline"""
+        self.fill_circles([center_x], [center_y], [radius], char)
+
+    def fill_circles(self, center_xs, center_ys, radii, char="█"):
+        """Draw many filled circles as scanline spans"""
+        center_xs, center_ys, radii = (np.atleast_1d(np.asarray(a, dtype=np.int64)) for a in (center_xs, center_ys, radii))
+        ys, starts, ends = [], [], []
+        for radius in np.unique(radii):
+            rows, half = self._circle_spans(int(radius))
+            mine = radii == radius
+            ys.append((center_ys[mine, None] + rows).ravel())
+            starts.append((center_xs[mine, None] - half).ravel())
+            ends.append((center_xs[mine, None] + half).ravel())
+        if ys:
+            self._fill_spans(np.concatenate(ys), np.concatenate(starts), np.concatenate(ends), char)
+
+    def draw_polygon(self, points, char="█"):
+        """Draw the closed outline through points [(x, y), ...]"""
+        points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+        following = np.roll(points, -1, axis=0)
+        self.draw_lines(points[:, 0], points[:, 1], following[:, 0], following[:, 1], char)
+
+    def _polygon_spans(self, points):
+        """Interior scanline spans by the even-odd rule, sampling each row at its integer y"""
+        following = np.roll(points, -1, axis=0)
+        x0, y0 = points[:, 0].astype(float), points[:, 1].astype(float)
+        x1, y1 = following[:, 0].astype(float), following[:, 1].astype(float)
+        rows = np.arange(max(points[:, 1].min(), 0), min(points[:, 1].max(), self.height - 1) + 1)
+        y = rows[:, None]
+        # Half-open in y so a vertex shared by two edges is counted once
+        crosses = (np.minimum(y0, y1) <= y) & (y < np.maximum(y0, y1))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            xs = np.where(crosses, x0 + (y - y0) * (x1 - x0) / (y1 - y0), np.nan)
+        xs = np.sort(xs, axis=1)  # NaNs sort last
+        if xs.shape[1] % 2:
+            xs = np.pad(xs, ((0, 0), (0, 1)), constant_values=np.nan)
+        starts, ends = xs[:, 0::2], xs[:, 1::2]
+        valid = ~np.isnan(ends)
+        span_rows = np.broadcast_to(rows[:, None], starts.shape)[valid]
+        return span_rows, np.ceil(starts[valid]), np.floor(ends[valid])
+
+    def fill_polygon(self, points, char="█"):
+        """Draw a filled polygon: scanline interior plus the draw_polygon outline"""
+        self.fill_polygons([points], char)
+
+    def fill_polygons(self, polygons, char="█"):
+        """Draw many filled polygons with one span fill and one batched outline"""
+        ys, starts, ends, edges = [], [], [], []
+        for points in polygons:
+            points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+            if not len(points):
+                continue
+            rows, x_starts, x_ends = self._polygon_spans(points)
+            ys.append(rows)
+            starts.append(x_starts)
+            ends.append(x_ends)
+            edges.append(np.concatenate((points, np.roll(points, -1, axis=0)), axis=1))
+        if not edges:
+            return
+        self._fill_spans(np.concatenate(ys), np.concatenate(starts), np.concatenate(ends), char)
+        edges = np.concatenate(edges)
+        self.draw_lines(edges[:, 0], edges[:, 1], edges[:, 2], edges[:, 3], char)
+
+    def quantize(self, values, vmin=None, vmax=None, ramp=None):
+        """Map values to ramp code points; vmin maps to ramp[0] and vmax to ramp[-1].
+
+        The range defaults to 0-255 for uint8 input and to the array's own
+        finite min and max otherwise. NaNs become the first ramp character.
+        """
+        ramp = np.array([ord(c) for c in (ramp or self.SHADING_CHARS)], dtype="<u4")
+        values = np.asarray(values)
+        if values.dtype == np.uint8:
+            vmin = 0 if vmin is None else vmin
+            vmax = 255 if vmax is None else vmax
+        elif vmin is None or vmax is None:
+            finite = values[np.isfinite(values)]
+            vmin = (finite.min() if finite.size else 0.0) if vmin is None else vmin
+            vmax = (finite.max() if finite.size else 1.0) if vmax is None else vmax
+        scale = len(ramp) / (vmax - vmin) if vmax > vmin else 0.0
+        levels = np.nan_to_num((values - vmin) * scale, nan=0.0)
+        return ramp[np.clip(levels, 0, len(ramp) - 1).astype(np.intp)]
+
+    def draw_array(self, values, x=0, y=0, width=None, height=None, vmin=None, vmax=None, ramp=None):
+        """Area-average a 2D array to width x height cells (default: the whole
+        buffer), shade it with the ramp and blit it with its top-left at (x, y)"""
+        width = self.width if width is None else width
+        height = self.height if height is None else height
+        values = np.asarray(values)
+        if values.dtype == np.uint8:
+            # Keep the fixed 0-255 range once resampling has made the values floats
+            vmin = 0 if vmin is None else vmin
+            vmax = 255 if vmax is None else vmax
+        cells = self.quantize(resample_area(values, height, width), vmin, vmax, ramp)
+        self.blit(cells, x, y)
+
+    def blit(self, codes, x, y):
+        """Copy an array of code points into the buffer, clipped to its edges"""
+        height, width = codes.shape
+        x1, y1 = max(x, 0), max(y, 0)
+        x2, y2 = min(x + width, self.width), min(y + height, self.height)
+        if x1 < x2 and y1 < y2:
+            self.buffer[y1:y2, x1:x2] = codes[y1 - y : y2 - y, x1 - x : x2 - x]
+
+    def draw_text(self, x, y, text):
+        """Write text left to right starting at (x, y), clipped to the buffer"""
+        if text:
+            self.blit(np.frombuffer(text.encode("utf-32-le"), dtype="<u4")[None, :], x, y)
+
+    def stream_npy(self, path, vmin=None, vmax=None, ramp=None):
+        """Draw each frame of a (frames, rows, columns) .npy file in turn, yielding
+        after each one. The file is memory-mapped, so only the current frame is
+        read into RAM. Without vmin/vmax, float frames use the range of the first
+        frame so the shading does not flicker from frame to frame."""
+        frames = np.load(path, mmap_mode="r")
+        if frames.ndim != 3:
+            raise ValueError(f"expected a (frames, rows, columns) array, got shape {frames.shape}")
+        if frames.dtype != np.uint8 and (vmin is None or vmax is None) and len(frames):
+            first = np.asarray(frames[0], dtype=float)
+            vmin = np.nanmin(first) if vmin is None else vmin
+            vmax = np.nanmax(first) if vmax is None else vmax
+        for index in range(len(frames)):
+            self.draw_array(frames[index], vmin=vmin, vmax=vmax, ramp=ramp)
+            yield index
 
     def shade_area(self, x1, y1, x2, y2, pattern=None):
         """Fill an area with a shading pattern"""
         if pattern is None:
             pattern = self.SHADING_CHARS[5]  # Medium shade
 
-        for y in range(y1, y2):
-            for x in range(x1, x2):
-                self.draw_pixel(x, y, pattern)
+        self._fill_rect(x1, y1, x2, y2, pattern)
 
     def render(self):
         """Render the buffer to string"""
-        return "\n".join("".join(row) for row in self.buffer)
+        frame = np.empty((self.height, self.width + 1), dtype="<u4")
+        frame[:, :-1] = self.buffer
+        frame[:, -1] = ord("\n")
+        return frame.tobytes().decode("utf-32-le")[:-1]
+
+
+class Sprite:
+    """A small pre-rasterized image: code points plus a mask of the opaque cells"""
+
+    def __init__(self, codes, mask=None):
+        self.codes = np.asarray(codes, dtype="<u4")
+        self.mask = self.codes != ord(" ") if mask is None else np.asarray(mask, dtype=bool)
+        self.height, self.width = self.codes.shape
+
+    @classmethod
+    def from_text(cls, text, transparent=" "):
+        """Build a sprite from lines of text; transparent characters show what is underneath"""
+        lines = text.split("\n")
+        width = max(len(line) for line in lines)
+        codes = np.array([[ord(c) for c in line.ljust(width, transparent)] for line in lines], dtype="<u4")
+        return cls(codes, codes != ord(transparent))
+
+    @classmethod
+    def from_draw(cls, width, height, draw, transparent=" "):
+        """Rasterize draw(renderer) once on a width x height scratch renderer"""
+        scratch = ASCIIRenderer(width, height)
+        if transparent != " ":
+            scratch.buffer.fill(ord(transparent))
+        draw(scratch)
+        return cls(scratch.buffer.copy(), scratch.buffer != ord(transparent))
+
+
+class Compositor:
+    """Stacks full-size layers and positioned sprites by z into one renderer.
+
+    Layers are rasterized once by their draw function and reused; sprites are
+    blitted by slicing. compose() rebuilds only the rectangles that changed
+    since the last call (where sprites were and are now, plus any redrawn
+    layer), so a static background costs nothing per frame. Items with equal
+    z stack in the order they were added.
+    """
+
+    def __init__(self, width, height):
+        self.renderer = ASCIIRenderer(width, height)
+        self.items = {}
+        self.order = []
+        self.dirty = [(0, 0, width, height)]
+
+    def _add(self, name, sprite, x, y, z):
+        if name in self.items:
+            self.remove(name)
+        self.items[name] = {"sprite": sprite, "x": int(x), "y": int(y), "z": z}
+        self.order.append(name)
+        self.order.sort(key=lambda n: self.items[n]["z"])  # stable, so ties keep insertion order
+        self._touch(name)
+
+    def _touch(self, name):
+        item = self.items[name]
+        sprite = item["sprite"]
+        self.dirty.append((item["x"], item["y"], item["x"] + sprite.width, item["y"] + sprite.height))
+
+    def add_layer(self, name, z, draw, transparent=" "):
+        """Add a full-size layer rasterized once by draw(renderer)"""
+        self._add(name, Sprite.from_draw(self.renderer.width, self.renderer.height, draw, transparent), 0, 0, z)
+
+    def redraw_layer(self, name, draw, transparent=" "):
+        item = self.items[name]
+        item["sprite"] = Sprite.from_draw(self.renderer.width, self.renderer.height, draw, transparent)
+        self._touch(name)
+
+    def add_sprite(self, name, sprite, x, y, z):
+        self._add(name, sprite, x, y, z)
+
+    def move(self, name, x, y):
+        item = self.items[name]
+        x, y = int(x), int(y)
+        old_x, old_y = item["x"], item["y"]
+        if (old_x, old_y) == (x, y):
+            return
+        item["x"], item["y"] = x, y
+        sprite = item["sprite"]
+        if abs(x - old_x) < sprite.width and abs(y - old_y) < sprite.height:
+            # The old and new positions overlap, so one rectangle covers both
+            self.dirty.append((min(x, old_x), min(y, old_y), max(x, old_x) + sprite.width, max(y, old_y) + sprite.height))
+        else:
+            self.dirty.append((old_x, old_y, old_x + sprite.width, old_y + sprite.height))
+            self._touch(name)
+
+    def remove(self, name):
+        self._touch(name)
+        del self.items[name]
+        self.order.remove(name)
+
+    def compose(self):
+        """Rebuild the dirty rectangles in the renderer; returns the clipped rectangles"""
+        if not self.dirty:
+            return []
+        rects = np.array(self.dirty, dtype=np.int64)
+        self.dirty = []
+        rects[:, 0:2] = np.maximum(rects[:, 0:2], 0)
+        rects[:, 2] = np.minimum(rects[:, 2], self.renderer.width)
+        rects[:, 3] = np.minimum(rects[:, 3], self.renderer.height)
+        rects = rects[(rects[:, 0] < rects[:, 2]) & (rects[:, 1] < rects[:, 3])]
+
+        items = [self.items[name] for name in self.order]
+        boxes = np.array(
+            [(i["x"], i["y"], i["x"] + i["sprite"].width, i["y"] + i["sprite"].height) for i in items], dtype=np.int64
+        ).reshape(-1, 4)
+        # Which items each rectangle overlaps, worked out for all rectangles at once
+        hits = (
+            (boxes[None, :, 0] < rects[:, None, 2])
+            & (boxes[None, :, 2] > rects[:, None, 0])
+            & (boxes[None, :, 1] < rects[:, None, 3])
+            & (boxes[None, :, 3] > rects[:, None, 1])
+        )
+        for (x1, y1, x2, y2), row in zip(rects.tolist(), hits):
+            out = self.renderer.buffer[y1:y2, x1:x2]
+            out.fill(ord(" "))
+            for index in np.flatnonzero(row).tolist():
+                item = items[index]
+                sprite, sx, sy = item["sprite"], item["x"], item["y"]
+                ix1, iy1 = max(x1, sx), max(y1, sy)
+                ix2, iy2 = min(x2, sx + sprite.width), min(y2, sy + sprite.height)
+                source = (slice(iy1 - sy, iy2 - sy), slice(ix1 - sx, ix2 - sx))
+                np.copyto(out[iy1 - y1 : iy2 - y1, ix1 - x1 : ix2 - x1], sprite.codes[source], where=sprite.mask[source])
+        return [tuple(rect) for rect in rects.tolist()]
+
+
+@lru_cache(maxsize=64)
+def _area_weights(n_in, n_out):
+    """(n_out, n_in) matrix averaging the input cells each output cell overlaps"""
+    edges = np.arange(n_out + 1) * (n_in / n_out)
+    lo, hi = edges[:-1, None], edges[1:, None]
+    cells = np.arange(n_in)
+    overlap = np.clip(np.minimum(hi, cells + 1) - np.maximum(lo, cells), 0, None)
+    return overlap / overlap.sum(axis=1, keepdims=True)
+
+
+def resample_area(values, height, width):
+    """Resize a 2D array by area averaging; each output cell is the mean of the
+    (fractional) input cells under it. NaNs are left out of the mean."""
+    values = np.asarray(values, dtype=float)
+    if values.ndim != 2:
+        raise ValueError(f"expected a 2D array, got shape {values.shape}")
+    rows = _area_weights(values.shape[0], height)
+    cols = _area_weights(values.shape[1], width)
+    missing = np.isnan(values)
+    if not missing.any():
+        return rows @ values @ cols.T
+    weight = rows @ (~missing) @ cols.T
+    with np.errstate(invalid="ignore"):
+        return (rows @ np.where(missing, 0.0, values) @ cols.T) / weight
+
+
+class TerminalPresenter:
+    """Writes renderer frames to a terminal, sending only what changed.
+
+    The first frame (or any frame after invalidate() or a resize) is a full
+    redraw. After that, each changed row is split into runs of changed cells,
+    and each run is written after an ANSI cursor-position sequence. Runs
+    separated by fewer than merge_gap unchanged cells are joined, because
+    re-sending a few cells is cheaper than another escape sequence. When the
+    runs would cost more than the whole frame, the frame is redrawn instead.
+    Each frame is one write.
+    """
+
+    def __init__(self, stream=None, merge_gap=6):
+        self.stream = stream if stream is not None else sys.stdout
+        self.merge_gap = merge_gap
+        self.previous = None
+        self.bytes_written = 0
+
+    def invalidate(self):
+        self.previous = None
+
+    def present(self, renderer):
+        self.write(self.encode(renderer))
+
+    def encode(self, renderer):
+        """Return the text that brings the terminal from the last frame to this one"""
+        frame = renderer.buffer
+        if self.previous is None or self.previous.shape != frame.shape:
+            out = "\x1b[H\x1b[2J" + renderer.render()
+        else:
+            out = self._encode_diff(frame, renderer)
+        self.previous = frame.copy()
+        return out
+
+    def _encode_diff(self, frame, renderer):
+        height, width = frame.shape
+        changed = frame != self.previous
+        dirty = np.flatnonzero(changed.any(axis=1))
+        if not len(dirty):
+            return ""
+        # Edges of the runs of changed cells, for all dirty rows at once:
+        # padding each row with unchanged cells makes every run start and end inside it
+        padded = np.zeros((len(dirty), width + 2), dtype=np.int8)
+        padded[:, 1:-1] = changed[dirty]
+        edges = np.diff(padded, axis=1)
+        rows, starts = np.nonzero(edges == 1)
+        ends = np.nonzero(edges == -1)[1]
+        rows = dirty[rows]
+        # Join a run to the one before it on the same row when the gap is short
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = (rows[1:] != rows[:-1]) | (starts[1:] - ends[:-1] >= self.merge_gap)
+        last = np.append(first[1:], True)
+        rows, starts, ends = rows[first], starts[first], ends[last]
+        # Characters of each "ESC [ row ; col H" and its cells, against "ESC [ H"
+        # and the rendered frame (rows plus the newlines between them)
+        digits = np.floor(np.log10(np.concatenate((rows, starts)) + 1)).astype(int) + 1
+        if 4 * len(rows) + digits.sum() + (ends - starts).sum() >= height * (width + 1) + 2:
+            return "\x1b[H" + renderer.render()
+        text = frame.tobytes().decode("utf-32-le")
+        offsets = rows * width
+        return "".join(
+            f"\x1b[{y + 1};{x + 1}H{text[offset + x : offset + end]}"
+            for y, x, end, offset in zip(rows.tolist(), starts.tolist(), ends.tolist(), offsets.tolist())
+        )
+
+    def write(self, out):
+        if out:
+            self.stream.write(out)
+            self.stream.flush()
+            self.bytes_written += len(out.encode())
+
+
+class FrameStats:
+    """Per-stage frame timings over the last window frames, plus a rolling FPS"""
+
+    STAGES = ("update", "rasterize", "render", "write")
+
+    def __init__(self, window=600):
+        self.timings = {stage: deque(maxlen=window) for stage in self.STAGES}
+        self.frame_times = deque()
+        self.frames = 0
+        self.updates = 0
+        self.dropped = 0
+
+    def record(self, now, **stage_seconds):
+        self.frames += 1
+        for stage, seconds in stage_seconds.items():
+            self.timings[stage].append(seconds)
+        self.frame_times.append(now)
+        while self.frame_times[0] < now - 1.0:
+            self.frame_times.popleft()
+
+    def fps(self):
+        """Frames shown in the last second"""
+        return len(self.frame_times)
+
+    def percentiles(self, qs=(50, 90, 99)):
+        """{stage: {q: milliseconds}} over the window"""
+        return {
+            stage: {q: float(np.percentile(values, q)) * 1000 if values else 0.0 for q in qs}
+            for stage, values in self.timings.items()
+        }
+
+    def summary(self):
+        lines = [f"{self.frames} frames, {self.updates} updates, {self.dropped} dropped, {self.fps()} fps"]
+        for stage, ps in self.percentiles().items():
+            lines.append(f"{stage:<10}" + "  ".join(f"p{q} {ms:7.3f} ms" for q, ms in ps.items()))
+        return "\n".join(lines)
+
+
+class AnimationLoop:
+    """Fixed-timestep loop: update(dt) advances the simulation in steps of
+    exactly dt, draw(renderer) rasterizes the current state, and the presenter
+    writes it out.
+
+    Frames are due on a fixed grid of dt. A frame that runs over its budget
+    does not make the next one late: the frames whose slots have passed are
+    dropped, and their updates are still run (up to max_catch_up per frame),
+    so simulated time keeps pace with wall time.
+    """
+
+    def __init__(self, renderer, update, draw, dt=1 / 30, presenter=None, max_catch_up=5, stats=None):
+        self.renderer = renderer
+        self.update = update
+        self.draw = draw
+        self.dt = dt
+        self.presenter = presenter if presenter is not None else TerminalPresenter()
+        self.max_catch_up = max_catch_up
+        self.stats = stats if stats is not None else FrameStats()
+
+    def run(self, frames=None, duration=None, clock=time.perf_counter, sleep=time.sleep):
+        """Run until frames have been shown or duration seconds have passed"""
+        start = next_frame = clock()
+        shown = 0
+        while (frames is None or shown < frames) and (duration is None or clock() - start < duration):
+            t0 = clock()
+            behind = int((t0 - next_frame) // self.dt) + 1 if t0 >= next_frame else 1
+            steps = min(behind, self.max_catch_up)
+            for _ in range(steps):
+                self.update(self.dt)
+            self.stats.updates += steps
+            self.stats.dropped += behind - 1
+            next_frame += behind * self.dt
+
+            t1 = clock()
+            self.draw(self.renderer)
+            t2 = clock()
+            out = self.presenter.encode(self.renderer)
+            t3 = clock()
+            self.presenter.write(out)
+            t4 = clock()
+            self.stats.record(t4, update=t1 - t0, rasterize=t2 - t1, render=t3 - t2, write=t4 - t3)
+            shown += 1
+
+            wait = next_frame - clock()
+            if wait > 0:
+                sleep(wait)
+        return self.stats
+
+
+def benchmark_presenter(width=200, height=60, frames=300):
+    """Compare bytes written and frame time of diff presenting against full redraws"""
+
+    def moving_sprite(renderer, t):
+        renderer.draw_box(0, 0, width, height)
+        renderer.draw_circle(20 + t % (width - 40), height // 2, 8)
+
+    def ticker(renderer, t):
+        renderer.draw_box(0, 0, width, height)
+        renderer.shade_area(2, 2, width - 2, height - 2, ".")
+        text = f"frame {t:6d}"
+        for i, ch in enumerate(text):
+            renderer.draw_pixel(4 + i, 1, ch)
+
+    def noise(renderer, t):
+        rng = np.random.default_rng(t)
+        codes = np.array([ord(c) for c in ASCIIRenderer.SHADING_CHARS], dtype="<u4")
+        renderer.buffer[:] = codes[rng.integers(0, len(codes), (height, width))]
+
+    print(f"{width}x{height}, {frames} frames")
+    print(f"{'scene':<14} {'mode':<6} {'KB/frame':>9} {'ms/frame':>9}")
+    for name, scene in (("moving sprite", moving_sprite), ("ticker", ticker), ("full noise", noise)):
+        for mode in ("full", "diff"):
+            renderer = ASCIIRenderer(width, height)
+            stream = io.StringIO()
+            presenter = TerminalPresenter(stream)
+            written = 0
+            start = time.perf_counter()
+            for t in range(frames):
+                renderer.clear()
+                scene(renderer, t)
+                if mode == "full":
+                    out = "\x1b[H" + renderer.render()
+                    stream.write(out)
+                    written += len(out.encode())
+                else:
+                    presenter.present(renderer)
+            elapsed = time.perf_counter() - start
+            if mode == "diff":
+                written = presenter.bytes_written
+            print(f"{name:<14} {mode:<6} {written / frames / 1024:>9.2f} {elapsed / frames * 1000:>9.3f}")
+
+
+def benchmark_primitives(width=200, height=60, count=5000, seed=0):
+    """Time scalar primitive loops against the batched versions on random shapes"""
+    rng = np.random.default_rng(seed)
+    x1s, x2s = rng.integers(-20, width + 20, (2, count))
+    y1s, y2s = rng.integers(-20, height + 20, (2, count))
+    radii = rng.integers(0, 12, count)
+
+    def timed(draw):
+        renderer = ASCIIRenderer(width, height)
+        start = time.perf_counter()
+        draw(renderer)
+        return (time.perf_counter() - start) * 1000
+
+    cases = {
+        "lines": (
+            lambda r: [r.draw_line(*map(int, line)) for line in zip(x1s, y1s, x2s, y2s)],
+            lambda r: r.draw_lines(x1s, y1s, x2s, y2s),
+        ),
+        "circles": (
+            lambda r: [r.draw_circle(*map(int, circle)) for circle in zip(x1s, y1s, radii)],
+            lambda r: r.draw_circles(x1s, y1s, radii),
+        ),
+    }
+    print(f"{count} shapes on {width}x{height}")
+    for name, (scalar, batched) in cases.items():
+        print(f"{name:<8} scalar {timed(scalar):8.2f} ms   batched {timed(batched):8.2f} ms")
+
+
+def animate_demo(seconds=5.0, fps=30):
+    """Bouncing ball inside the main() box, with live frame statistics underneath"""
+    renderer = ASCIIRenderer(40, 22)
+    ball = {"x": 20.0, "y": 10.0, "vx": 14.0, "vy": 9.0}
+
+    def update(dt):
+        for axis, low, high in (("x", 7, 32), ("y", 4, 15)):
+            ball[axis] += ball["v" + axis] * dt
+            if not low <= ball[axis] <= high:
+                ball["v" + axis] *= -1
+                ball[axis] = min(max(ball[axis], low), high)
+
+    def draw(r):
+        r.clear()
+        r.draw_box(5, 2, 30, 15)
+        r.fill_circle(round(ball["x"]), round(ball["y"]), 2, "o")
+        ps = loop.stats.percentiles((99,))
+        status = f"{loop.stats.fps():3d} fps  draw p99 {ps['rasterize'][99]:.2f}ms  dropped {loop.stats.dropped}"
+        r.draw_text(0, 18, status)
+
+    loop = AnimationLoop(renderer, update, draw, dt=1 / fps)
+    loop.run(duration=seconds)
+    print("\n" + loop.stats.summary())
+
+
+def benchmark_layers(width=200, height=60, sprites=20, frames=300, seed=0):
+    """Per-frame cost of redrawing everything against compositing dirty regions"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:1:height * 1j, 0:1:width * 1j]
+    terrain = np.sin(12 * x) * np.cos(9 * y) + rng.normal(scale=0.2, size=(height, width))
+
+    roads = rng.integers(0, [width, height, width, height], (300, 4)).T
+
+    def background(r):
+        r.draw_array(terrain)
+        r.draw_lines(*roads, char="+")
+        r.draw_box(0, 0, width, height)
+
+    ball = Sprite.from_draw(7, 7, lambda r: r.fill_circle(3, 3, 3, "o"))
+    starts = rng.integers(0, [width - 7, height - 7], (sprites, 2))
+    velocity = rng.choice([-1, 1], (sprites, 2))
+
+    def positions(t):
+        span = np.array([width - 7, height - 7])
+        p = (starts + velocity * t) % (2 * span)
+        return np.where(p > span, 2 * span - p, p)
+
+    full = ASCIIRenderer(width, height)
+    start = time.perf_counter()
+    for t in range(frames):
+        full.clear()
+        background(full)
+        for px, py in positions(t):
+            full.blit(np.where(ball.mask, ball.codes, full.buffer[py : py + 7, px : px + 7]), px, py)
+    redraw = (time.perf_counter() - start) / frames
+
+    compositor = Compositor(width, height)
+    compositor.add_layer("background", 0, background)
+    for i, (px, py) in enumerate(positions(0)):
+        compositor.add_sprite(f"ball{i}", ball, px, py, 1)
+    compositor.compose()
+    start = time.perf_counter()
+    for t in range(frames):
+        for i, (px, py) in enumerate(positions(t)):
+            compositor.move(f"ball{i}", px, py)
+        compositor.compose()
+    composed = (time.perf_counter() - start) / frames
+
+    same = np.array_equal(full.buffer, compositor.renderer.buffer)
+    print(f"{width}x{height}, {sprites} sprites over a shaded background with 300 lines, {frames} frames")
+    print(f"full redraw  {redraw * 1000:7.3f} ms/frame")
+    print(f"compositor   {composed * 1000:7.3f} ms/frame   (last frames identical: {same})")
 
 
 # Example usage
@@ -125,4 +797,29 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="ASCII renderer demo")
+    parser.add_argument("--bench-present", action="store_true", help="benchmark diff presenting against full redraws")
+    parser.add_argument("--bench-primitives", action="store_true", help="benchmark batched against scalar primitives")
+    parser.add_argument("--bench-layers", action="store_true", help="benchmark layer compositing against full redraws")
+    parser.add_argument("--play", metavar="NPY", help="play a (frames, rows, columns) .npy file as shaded ASCII")
+    parser.add_argument("--size", default="80x24", help="WIDTHxHEIGHT for --play")
+    parser.add_argument("--fps", type=float, default=24.0)
+    parser.add_argument("--animate", type=float, metavar="SECONDS", help="run the bouncing-ball frame loop demo")
+    args = parser.parse_args()
+    if args.bench_present:
+        benchmark_presenter()
+    elif args.bench_primitives:
+        benchmark_primitives()
+    elif args.bench_layers:
+        benchmark_layers()
+    elif args.animate:
+        animate_demo(args.animate, args.fps)
+    elif args.play:
+        width, height = (int(n) for n in args.size.lower().split("x"))
+        renderer = ASCIIRenderer(width, height)
+        presenter = TerminalPresenter()
+        for _ in renderer.stream_npy(args.play):
+            presenter.present(renderer)
+            time.sleep(1 / args.fps)
+    else:
+        main()
@@ -0,0 +1,218 @@
+import argparse
+import time
+
+import numpy as np
+
+from asciiRendering.first import ASCIIRenderer
+
+# Terminal plotting on top of ASCIIRenderer, for headless runs of the model
+# scripts. Series are stored when added and rasterized in render(), once the
+# axis limits of everything on the plot are known. Nothing here imports
+# matplotlib. Run the demo from the repo root: python -m asciiRendering.plot
+
+LINE_CHARS = "█*o+x#"
+
+
+def _format_tick(value):
+    return f"{value:.4g}"
+
+
+class TerminalPlot:
+    """A small matplotlib-like figure drawn with characters.
+
+    plot() draws polylines, scatter() draws point density (points are binned
+    per cell and the count is shaded with a ramp, so a million points cost
+    one bincount), and hist() draws vertical bars.
+    """
+
+    def __init__(self, width=80, height=24):
+        self.width = width
+        self.height = height
+        self.series = []
+        self.title_text = ""
+        self.xlabel_text = ""
+        self.ylabel_text = ""
+        self.xlim = None
+        self.ylim = None
+
+    def title(self, text):
+        self.title_text = text
+
+    def xlabel(self, text):
+        self.xlabel_text = text
+
+    def ylabel(self, text):
+        self.ylabel_text = text
+
+    def set_xlim(self, low, high):
+        self.xlim = (low, high)
+
+    def set_ylim(self, low, high):
+        self.ylim = (low, high)
+
+    def plot(self, x, y=None, char=None, label=None):
+        """Connect consecutive (x, y) points with lines; NaNs break the line.
+        With one argument it is y, plotted against its index."""
+        if y is None:
+            x, y = np.arange(len(np.ravel(x))), x
+        x = np.asarray(x, dtype=float).ravel()
+        y = np.asarray(y, dtype=float).ravel()
+        if char is None:
+            lines = sum(kind == "line" for kind, *_ in self.series)
+            char = LINE_CHARS[lines % len(LINE_CHARS)]
+        self.series.append(("line", x, y, char, label))
+
+    def scatter(self, x, y, ramp=None, log=True, label=None):
+        """Shade each cell by how many points fall in it (log-scaled by default)"""
+        x = np.asarray(x, dtype=float).ravel()
+        y = np.asarray(y, dtype=float).ravel()
+        self.series.append(("scatter", x, y, (ramp or ASCIIRenderer.SHADING_CHARS[1:], log), label))
+
+    def hist(self, values, bins=None, range=None, char="█", label=None):
+        """Histogram with one bar per column by default; returns (counts, edges)"""
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[np.isfinite(values)]
+        counts, edges = np.histogram(values, bins=bins or max(1, self.width - 12), range=range)
+        # Drawn as bars from 0, so the plot limits come from the edges and counts
+        self.series.append(("bars", edges, counts.astype(float), char, label))
+        return counts, edges
+
+    def _limits(self):
+        xs, ys = [], []
+        for kind, x, y, _, _ in self.series:
+            if kind == "bars":
+                # x holds the bin edges; bars start at 0
+                xs += [x[0], x[-1]]
+                ys += [0.0, y.max(initial=0.0)]
+                continue
+            finite = np.isfinite(x) & np.isfinite(y)
+            if finite.any():
+                xs += [x[finite].min(), x[finite].max()]
+                ys += [y[finite].min(), y[finite].max()]
+        xlim = self.xlim or (min(xs, default=0.0), max(xs, default=1.0))
+        ylim = self.ylim or (min(ys, default=0.0), max(ys, default=1.0))
+        # A flat series still needs a non-empty range
+        if xlim[1] <= xlim[0]:
+            xlim = (xlim[0] - 0.5, xlim[0] + 0.5)
+        if ylim[1] <= ylim[0]:
+            ylim = (ylim[0] - 0.5, ylim[0] + 0.5)
+        return xlim, ylim
+
+    def _draw_series(self, canvas, xlim, ylim):
+        w, h = canvas.width, canvas.height
+        x_scale = (w - 1) / (xlim[1] - xlim[0])
+        y_scale = (h - 1) / (ylim[1] - ylim[0])
+
+        for kind, x, y, style, _ in self.series:
+            if kind == "line":
+                cols = np.rint((x - xlim[0]) * x_scale)
+                rows = np.rint((ylim[1] - y) * y_scale)
+                ok = np.isfinite(cols) & np.isfinite(rows)
+                # Keep the integer conversion safe for points far off the canvas
+                cols = np.clip(np.where(ok, cols, 0), -4 * w, 5 * w).astype(np.int64)
+                rows = np.clip(np.where(ok, rows, 0), -4 * h, 5 * h).astype(np.int64)
+                if len(cols) == 1 and ok[0]:
+                    canvas.draw_lines(cols, rows, cols, rows, style)
+                segment = ok[:-1] & ok[1:]
+                canvas.draw_lines(cols[:-1][segment], rows[:-1][segment], cols[1:][segment], rows[1:][segment], style)
+            elif kind == "scatter":
+                ramp, log = style
+                cols = np.floor((x - xlim[0]) * (w / (xlim[1] - xlim[0])))
+                rows = np.floor((ylim[1] - y) * (h / (ylim[1] - ylim[0])))
+                # Points exactly on the upper limits belong to the last cell
+                cols[cols == w] = w - 1
+                rows[rows == h] = h - 1
+                inside = (cols >= 0) & (cols < w) & (rows >= 0) & (rows < h)
+                cells = rows[inside].astype(np.int64) * w + cols[inside].astype(np.int64)
+                density = np.bincount(cells, minlength=w * h).reshape(h, w).astype(float)
+                occupied = density > 0
+                if log:
+                    density = np.log1p(density)
+                codes = canvas.quantize(density, 0.0, density.max(initial=0.0), ramp)
+                canvas.buffer[occupied] = codes[occupied]
+            else:
+                edges, counts, char = x, y, style
+                # Each bin covers the columns its edges fall in, so bars have no
+                # gaps whatever the bin count; a column shared by bins shows the tallest
+                first = np.floor((edges[:-1] - xlim[0]) * (w / (xlim[1] - xlim[0]))).astype(np.int64)
+                last = np.maximum(np.ceil((edges[1:] - xlim[0]) * (w / (xlim[1] - xlim[0]))).astype(np.int64) - 1, first)
+                first, last = np.clip(first, 0, w), np.clip(last, -1, w - 1)
+                spans = np.maximum(last - first + 1, 0)
+                cols = np.repeat(first, spans) + np.arange(spans.sum()) - np.repeat(np.cumsum(spans) - spans, spans)
+                tops = np.full(w, h, dtype=np.int64)
+                np.minimum.at(tops, cols, np.repeat(np.rint((ylim[1] - counts) * y_scale).astype(np.int64), spans))
+                tops[np.bincount(cols[np.repeat(counts, spans) > 0], minlength=w) == 0] = h
+                baseline = np.rint(ylim[1] * y_scale)
+                rows = np.arange(h)[:, None]
+                canvas.buffer[(rows >= tops) & (rows <= baseline)] = ord(char)
+
+    def render(self):
+        """Lay out the title, y tick labels, axes, x tick labels, labels and legend"""
+        xlim, ylim = self._limits()
+        y_ticks = [_format_tick(ylim[1]), _format_tick((ylim[0] + ylim[1]) / 2), _format_tick(ylim[0])]
+        margin = max(len(t) for t in y_ticks) + 1
+        legend = [(style if kind != "scatter" else style[0][-1], label) for kind, _, _, style, label in self.series if label]
+        top = 1 if self.title_text else 0
+        bottom = 2 + bool(self.xlabel_text) + bool(legend)
+        plot_w = max(1, self.width - margin - 1)
+        plot_h = max(1, self.height - top - bottom)
+
+        canvas = ASCIIRenderer(plot_w, plot_h)
+        self._draw_series(canvas, xlim, ylim)
+
+        frame = ASCIIRenderer(self.width, self.height)
+        frame.draw_text(max(0, (self.width - len(self.title_text)) // 2), 0, self.title_text)
+        frame.blit(canvas.buffer, margin + 1, top)
+        frame._fill_rect(margin, top, margin + 1, top + plot_h, "│")
+        frame._fill_rect(margin + 1, top + plot_h, self.width, top + plot_h + 1, "─")
+        frame.draw_pixel(margin, top + plot_h, "└")
+        for text, row in zip(y_ticks, (top, top + (plot_h - 1) // 2, top + plot_h - 1)):
+            frame.draw_text(margin - len(text), row, text)
+        if self.ylabel_text:
+            frame.draw_text(0, top + plot_h // 2 + 1, self.ylabel_text[:margin])
+        x_low, x_high = _format_tick(xlim[0]), _format_tick(xlim[1])
+        frame.draw_text(margin + 1, top + plot_h + 1, x_low)
+        frame.draw_text(self.width - len(x_high), top + plot_h + 1, x_high)
+        row = top + plot_h + 2
+        if self.xlabel_text:
+            frame.draw_text(margin + 1 + max(0, (plot_w - len(self.xlabel_text)) // 2), row, self.xlabel_text)
+            row += 1
+        if legend:
+            frame.draw_text(margin + 1, row, "   ".join(f"{char} {label}" for char, label in legend))
+        return frame.render()
+
+    def show(self):
+        print(self.render())
+
+
+def demo(points=1_000_000, width=100, height=30, seed=0):
+    """Headless version of area-under-exponential-curve.py, timing each stage"""
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(0, 10, points)
+    y = rng.uniform(2, 2 * np.exp(10), points)
+
+    fig = TerminalPlot(width, height)
+    fig.scatter(x[y <= 2 * np.exp(x)], y[y <= 2 * np.exp(x)], label="points under curve")
+    curve = np.linspace(0, 10, 1000)
+    fig.plot(curve, 2 * np.exp(curve), char="#", label="y = 2e^x")
+    fig.title(f"{points:,} points")
+    fig.xlabel("x")
+    start = time.perf_counter()
+    text = fig.render()
+    elapsed = time.perf_counter() - start
+    print(text)
+    print(f"rendered in {elapsed * 1000:.1f} ms")
+
+    fig = TerminalPlot(width, 16)
+    fig.hist(rng.normal(size=points))
+    fig.title("normal sample")
+    fig.show()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Terminal plotting demo")
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--width", type=int, default=100)
+    parser.add_argument("--height", type=int, default=30)
+    args = parser.parse_args()
+    demo(args.points, args.width, args.height)
@@ -0,0 +1,233 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from connect_four import ConnectFour, worker_game
+
+HELP = "commands: MOVE <col> | NEW [ai] | BOARD | STATS | QUIT"
+
+
+def _search(settings, moves, time_limit):
+    """Run in a worker process: replay moves and return (column, depth, nodes)"""
+    game = worker_game(settings, moves)
+    col, _, depth = game.iterative_deepening(time_limit=time_limit)
+    return col, depth, game.nodes
+
+
+class Metrics:
+    def __init__(self, window=1000):
+        self.games_started = 0
+        self.games_active = 0
+        self.searches = 0
+        self.queued = 0
+        self.running = 0
+        self.latencies = deque(maxlen=window)
+        self.waits = deque(maxlen=window)
+
+    def as_dict(self):
+        def pct(values, q):
+            return float(np.percentile(values, q)) if values else 0.0
+
+        return {
+            "games_started": self.games_started,
+            "games_active": self.games_active,
+            "searches": self.searches,
+            "queue_depth": self.queued,
+            "searches_running": self.running,
+            "search_latency_p50": pct(self.latencies, 50),
+            "search_latency_p90": pct(self.latencies, 90),
+            "search_latency_p99": pct(self.latencies, 99),
+            "queue_wait_p50": pct(self.waits, 50),
+            "queue_wait_p99": pct(self.waits, 99),
+        }
+
+
+class GameServer:
+    """Hosts one ConnectFour game per client connection over a line protocol.
+
+    A MOVE answers OK, then the AI's reply as "AI <col>", and ends with either
+    "TURN" (your move) or "END you|ai|draw".
+
+    The event loop only does I/O and bookkeeping; every AI search runs in a
+    bounded process pool, so a deep search in one game never blocks the others.
+    """
+
+    def __init__(self, workers=None, max_pending=None, move_time=1.0, game_budget=60.0, geometry=None, tt_size_mb=16):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        # At most max_pending searches are handed to the pool; the rest wait here
+        self.slots = asyncio.Semaphore(max_pending or self.workers)
+        self.move_time = move_time
+        self.game_budget = game_budget
+        self.geometry = geometry or {}
+        # Games on the event loop keep no table; each worker has one of this size
+        self.tt_size_mb = tt_size_mb
+        self.metrics = Metrics()
+
+    async def search(self, game, time_limit):
+        self.metrics.queued += 1
+        queued_at = time.perf_counter()
+        async with self.slots:
+            self.metrics.queued -= 1
+            self.metrics.running += 1
+            started = time.perf_counter()
+            try:
+                loop = asyncio.get_running_loop()
+                # Worker tables are shared by every game that worker searches
+                settings = {**game.worker_settings, "tt_size_mb": self.tt_size_mb}
+                col, depth, nodes = await loop.run_in_executor(
+                    self.pool, _search, settings, list(game.moves), time_limit
+                )
+            finally:
+                self.metrics.running -= 1
+        finished = time.perf_counter()
+        self.metrics.searches += 1
+        self.metrics.waits.append(started - queued_at)
+        self.metrics.latencies.append(finished - started)
+        return col, finished - queued_at
+
+    def new_game(self):
+        self.metrics.games_started += 1
+        return ConnectFour(tt_size_mb=0, **self.geometry), self.game_budget
+
+    async def ai_move(self, game, budget, writer):
+        """Let the AI move; returns the remaining budget and whether the game ended"""
+        empty = game.ROW_COUNT * game.COLUMN_COUNT - len(game.moves)
+        time_limit = max(0.01, min(self.move_time, budget / max(1, empty // 2)))
+        col, elapsed = await self.search(game, time_limit)
+        game.drop_piece(game.get_next_open_row(col), col, game.AI_PIECE)
+        writer.write(f"AI {col + 1}\n".encode())
+        return budget - elapsed, self.game_over(game, writer)
+
+    def game_over(self, game, writer):
+        if game.winning_move(game.PLAYER_PIECE):
+            writer.write(b"END you\n")
+        elif game.winning_move(game.AI_PIECE):
+            writer.write(b"END ai\n")
+        elif not game.get_valid_locations():
+            writer.write(b"END draw\n")
+        else:
+            return False
+        return True
+
+    @staticmethod
+    def board_line(game):
+        symbols = {game.EMPTY: ".", game.PLAYER_PIECE: "X", game.AI_PIECE: "O"}
+        return "/".join(
+            "".join(symbols[game.piece_at(r, c)] for c in range(game.COLUMN_COUNT))
+            for r in range(game.ROW_COUNT - 1, -1, -1)
+        )
+
+    async def handle_client(self, reader, writer):
+        game, budget = self.new_game()
+        finished = False
+        self.metrics.games_active += 1
+        writer.write(
+            f"HELLO rows={game.ROW_COUNT} columns={game.COLUMN_COUNT} connect={game.WINDOW_LENGTH}\n{HELP}\n".encode()
+        )
+        try:
+            while True:
+                await writer.drain()
+                line = await reader.readline()
+                if not line:
+                    break
+                # Undecodable bytes become U+FFFD and fall through to the ERR reply
+                command, *args = line.decode(errors="replace").split() or [""]
+                command = command.upper()
+
+                if command == "MOVE":
+                    if finished:
+                        writer.write(b"ERR game over, send NEW\n")
+                        continue
+                    try:
+                        col = int(args[0]) - 1
+                    except (IndexError, ValueError):
+                        writer.write(b"ERR usage: MOVE <col>\n")
+                        continue
+                    if not (0 <= col < game.COLUMN_COUNT) or not game.is_valid_location(col):
+                        writer.write(b"ERR invalid column\n")
+                        continue
+                    game.drop_piece(game.get_next_open_row(col), col, game.PLAYER_PIECE)
+                    writer.write(b"OK\n")
+                    finished = self.game_over(game, writer)
+                    if not finished:
+                        await writer.drain()
+                        budget, finished = await self.ai_move(game, budget, writer)
+                    if not finished:
+                        writer.write(b"TURN\n")
+                elif command == "NEW":
+                    game, budget = self.new_game()
+                    finished = False
+                    writer.write(b"OK\n")
+                    if args and args[0].lower() == "ai":
+                        budget, finished = await self.ai_move(game, budget, writer)
+                    writer.write(b"TURN\n")
+                elif command == "BOARD":
+                    writer.write(f"BOARD {self.board_line(game)}\n".encode())
+                elif command == "STATS":
+                    writer.write(f"STATS {json.dumps(self.metrics.as_dict())}\n".encode())
+                elif command == "QUIT":
+                    writer.write(b"BYE\n")
+                    break
+                else:
+                    writer.write(f"ERR {HELP}\n".encode())
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.metrics.games_active -= 1
+            writer.close()
+
+    async def report_metrics(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            print(json.dumps(self.metrics.as_dict()), flush=True)
+
+
+async def serve(args):
+    geometry = {"rows": args.rows, "columns": args.columns, "connect": args.connect}
+    server = GameServer(args.workers, args.max_pending, args.move_time, args.game_budget, geometry, args.tt_size_mb)
+    if args.unix:
+        listener = await asyncio.start_unix_server(server.handle_client, path=args.unix)
+        print(f"Listening on {args.unix}", flush=True)
+    else:
+        listener = await asyncio.start_server(server.handle_client, args.host, args.port)
+        print(f"Listening on {args.host}:{args.port}", flush=True)
+    if args.metrics_interval:
+        asyncio.get_running_loop().create_task(server.report_metrics(args.metrics_interval))
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve many Connect Four games over a line protocol")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4444)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=None, help="search processes (default: all cores)")
+    parser.add_argument("--max-pending", type=int, default=None, help="searches handed to the pool at once")
+    parser.add_argument("--move-time", type=float, default=1.0, help="upper bound on one AI search, in seconds")
+    parser.add_argument("--game-budget", type=float, default=60.0, help="total AI time per game, in seconds")
+    parser.add_argument("--tt-size-mb", type=int, default=16, help="transposition table size per search process")
+    parser.add_argument("--metrics-interval", type=float, default=0, help="print metrics every N seconds")
+    parser.add_argument("--rows", type=int, default=6)
+    parser.add_argument("--columns", type=int, default=7)
+    parser.add_argument("--connect", type=int, default=4)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
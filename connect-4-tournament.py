@@ -0,0 +1,209 @@
+import argparse
+import csv
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from connect_four import ConnectFour
+
+
+class CenterOnlyConnectFour(ConnectFour):
+    """Evaluator variant that only counts pieces in the center column"""
+
+    def score_position(self, piece):
+        center_bits = ((1 << self.ROW_COUNT) - 1) << (self.center_column * self.COLUMN_HEIGHT)
+        return 3 * bin(self.bitboards[piece] & center_bits).count("1")
+
+
+EVALUATORS = {
+    "windows": ConnectFour,
+    "center": CenterOnlyConnectFour,
+}
+
+DEFAULT_SIDE = {"search": "iterative", "depth": 5, "time": None, "nodes": None, "evaluator": "windows", "tt": 16}
+
+
+def parse_side(spec):
+    """Parse 'depth=6,time=0.1,evaluator=center' into a side config"""
+    side = dict(DEFAULT_SIDE)
+    for item in filter(None, spec.split(",")):
+        key, value = item.split("=", 1)
+        if key not in side:
+            raise ValueError(f"unknown side option {key!r}")
+        if key in ("depth", "nodes", "tt"):
+            side[key] = int(value)
+        elif key == "time":
+            side[key] = float(value)
+        else:
+            side[key] = value
+    if side["evaluator"] not in EVALUATORS:
+        raise ValueError(f"unknown evaluator {side['evaluator']!r}")
+    if side["search"] not in ("fixed", "iterative"):
+        raise ValueError(f"unknown search {side['search']!r}")
+    return side
+
+
+def choose_move(game, side):
+    """Return (column, depth reached, nodes searched) for the side to move"""
+    if side["search"] == "fixed":
+        game.nodes = 0
+        col, _ = game.minimax(side["depth"], float("-inf"), float("inf"), True)
+        return col, side["depth"], game.nodes
+    col, _, depth = game.iterative_deepening(
+        time_limit=side["time"], max_nodes=side["nodes"], max_depth=side["depth"]
+    )
+    return col, depth, game.nodes
+
+
+def play_one_game(task):
+    """Play one seeded game; side A moves first in even-numbered games"""
+    index, seed, sides, opening_plies, geometry = task
+    rng = random.Random(seed)
+    a_first = index % 2 == 0
+    # Piece 1 always moves first
+    pieces = {"a": 1 if a_first else 2, "b": 2 if a_first else 1}
+    games = {
+        name: EVALUATORS[side["evaluator"]](
+            tt_size_mb=side["tt"], time_limit=side["time"], ai_piece=pieces[name], **geometry
+        )
+        for name, side in sides.items()
+    }
+    record = {"game": index, "seed": seed, "a_first": a_first, "moves": [], "winner": None}
+    stats = {name: {"latencies": [], "nodes": 0, "seconds": 0.0, "depths": []} for name in sides}
+
+    to_move = "a" if a_first else "b"
+    reference = games["a"]
+    while True:
+        valid = reference.get_valid_locations()
+        if not valid:
+            break
+        if len(reference.moves) < opening_plies:
+            col = rng.choice(valid)
+        else:
+            start = time.perf_counter()
+            col, depth, nodes = choose_move(games[to_move], sides[to_move])
+            elapsed = time.perf_counter() - start
+            stats[to_move]["latencies"].append(elapsed)
+            stats[to_move]["seconds"] += elapsed
+            stats[to_move]["nodes"] += nodes
+            stats[to_move]["depths"].append(depth)
+
+        piece = pieces[to_move]
+        for game in games.values():
+            game.drop_piece(game.get_next_open_row(col), col, piece)
+        record["moves"].append(col)
+        if reference.winning_move(piece):
+            record["winner"] = to_move
+            break
+        to_move = "b" if to_move == "a" else "a"
+
+    record["stats"] = stats
+    return record
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def summarize(records, sides):
+    summary = {"games": len(records), "sides": sides}
+    for name in sides:
+        other = "b" if name == "a" else "a"
+        latencies = [t for r in records for t in r["stats"][name]["latencies"]]
+        depths = [d for r in records for d in r["stats"][name]["depths"]]
+        nodes = sum(r["stats"][name]["nodes"] for r in records)
+        seconds = sum(r["stats"][name]["seconds"] for r in records)
+        summary[name] = {
+            "wins": sum(r["winner"] == name for r in records),
+            "losses": sum(r["winner"] == other for r in records),
+            "draws": sum(r["winner"] is None for r in records),
+            "nodes_per_second": nodes / seconds if seconds else 0.0,
+            "average_depth": sum(depths) / len(depths) if depths else 0.0,
+            "latency_p50": percentile(latencies, 50),
+            "latency_p90": percentile(latencies, 90),
+            "latency_p99": percentile(latencies, 99),
+            "latency_max": max(latencies, default=0.0),
+        }
+        for result in ("wins", "losses", "draws"):
+            summary[name][result[:-1] + "_rate"] = summary[name][result] / len(records) if records else 0.0
+    return summary
+
+
+def write_csv(path, records):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            ["game", "seed", "a_first", "winner", "plies", "a_nodes", "a_seconds", "b_nodes", "b_seconds", "moves"]
+        )
+        for r in records:
+            writer.writerow(
+                [
+                    r["game"],
+                    r["seed"],
+                    r["a_first"],
+                    r["winner"] or "draw",
+                    len(r["moves"]),
+                    r["stats"]["a"]["nodes"],
+                    f"{r['stats']['a']['seconds']:.6f}",
+                    r["stats"]["b"]["nodes"],
+                    f"{r['stats']['b']['seconds']:.6f}",
+                    " ".join(str(col + 1) for col in r["moves"]),
+                ]
+            )
+
+
+def run_tournament(sides, games, seed=0, workers=None, opening_plies=2, geometry=None):
+    """Play games in parallel; game i uses seed + i so every game can be replayed alone"""
+    geometry = geometry or {}
+    tasks = [(i, seed + i, sides, opening_plies, geometry) for i in range(games)]
+    if workers == 1:
+        return [play_one_game(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(play_one_game, tasks, chunksize=max(1, games // (4 * (workers or os.cpu_count() or 1)))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Connect Four AI-vs-AI tournament")
+    parser.add_argument("--a", default="", help="side A options, e.g. depth=6,time=0.1,evaluator=windows")
+    parser.add_argument("--b", default="", help="side B options, same keys as --a")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--opening-plies", type=int, default=2, help="random seeded moves before the AIs take over")
+    parser.add_argument("--rows", type=int, default=6)
+    parser.add_argument("--columns", type=int, default=7)
+    parser.add_argument("--connect", type=int, default=4)
+    parser.add_argument("--json", help="write the summary (and per-game records) to this file")
+    parser.add_argument("--csv", help="write one row per game to this file")
+    args = parser.parse_args()
+
+    sides = {"a": parse_side(args.a), "b": parse_side(args.b)}
+    start = time.perf_counter()
+    geometry = {"rows": args.rows, "columns": args.columns, "connect": args.connect}
+    records = run_tournament(sides, args.games, args.seed, args.workers, args.opening_plies, geometry)
+    summary = summarize(records, sides)
+    summary["wall_seconds"] = time.perf_counter() - start
+
+    for name in ("a", "b"):
+        s = summary[name]
+        print(
+            f"{name.upper()}: W {s['wins']} D {s['draws']} L {s['losses']}  "
+            f"{s['nodes_per_second']:,.0f} nodes/s  depth {s['average_depth']:.2f}  "
+            f"latency p50 {s['latency_p50'] * 1000:.1f}ms p90 {s['latency_p90'] * 1000:.1f}ms "
+            f"p99 {s['latency_p99'] * 1000:.1f}ms"
+        )
+    print(f"{args.games} games in {summary['wall_seconds']:.2f}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"summary": summary, "games": records}, f, indent=2)
+    if args.csv:
+        write_csv(args.csv, records)
+
+
+if __name__ == "__main__":
+    main()
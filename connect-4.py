@@ -1,33 +1,478 @@
 import numpy as np
+import argparse
+import json
 import random
 import os
 import time
+from concurrent.futures import ProcessPoolExecutor
 
 
 def clear_screen():
-    os.system("cls" if os.name == "nt" else "clear")
+    if os.name == "nt":
+        os.system("cls")
+    else:
+        # Home the cursor and clear in-process instead of spawning `clear`
+        print("\x1b[H\x1b[2J", end="", flush=True)
+
+
+class SearchTimeout(Exception):
+    """Raised inside minimax when the iterative-deepening budget runs out"""
+
+
+class SearchStats:
+    """Opt-in search counters and timers, filled in by ConnectFour.minimax.
+
+    Nodes are counted by ply below the search root. When trace_path is set, every
+    iterative_deepening call appends one JSON line with the move it chose
+    and the counters for that search.
+    """
+
+    def __init__(self, trace_path=None):
+        self.trace_path = trace_path
+        self.reset()
+
+    def reset(self):
+        self.nodes_by_ply = {}
+        self.beta_cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.tt_cutoffs = 0
+        self.eval_time = 0.0
+        self.win_time = 0.0
+        self.movegen_time = 0.0
+
+    @property
+    def first_move_cutoff_rate(self):
+        return self.first_move_cutoffs / self.beta_cutoffs if self.beta_cutoffs else 0.0
+
+    def as_dict(self):
+        return {
+            "nodes": sum(self.nodes_by_ply.values()),
+            "nodes_by_ply": {str(ply): n for ply, n in sorted(self.nodes_by_ply.items())},
+            "beta_cutoffs": self.beta_cutoffs,
+            "first_move_cutoff_rate": self.first_move_cutoff_rate,
+            "tt_probes": self.tt_probes,
+            "tt_hits": self.tt_hits,
+            "tt_cutoffs": self.tt_cutoffs,
+            "eval_seconds": self.eval_time,
+            "win_detection_seconds": self.win_time,
+            "movegen_seconds": self.movegen_time,
+        }
+
+    def record_move(self, **fields):
+        if self.trace_path is None:
+            return
+        with open(self.trace_path, "a") as f:
+            f.write(json.dumps({**fields, **self.as_dict()}) + "\n")
+
+
+class TranspositionTable:
+    """Fixed-size two-tier hash table of search results keyed by Zobrist hash.
+
+    Each bucket holds a depth-preferred slot, which only gives way to an
+    equal or deeper search, and an always-replace slot for everything else.
+    """
+
+    EXACT = 0
+    LOWER_BOUND = 1
+    UPPER_BOUND = 2
+
+    # Rough CPython cost of one stored entry tuple plus its slot
+    ENTRY_BYTES = 128
+
+    def __init__(self, size_mb=16):
+        buckets = 1
+        while buckets * 2 * 2 * self.ENTRY_BYTES <= size_mb * 1024 * 1024:
+            buckets *= 2
+        self.mask = buckets - 1
+        self.slots = [None] * (2 * buckets)
+        self.hits = 0
+        self.misses = 0
+        self.overwrites = 0
+
+    def clear(self):
+        self.slots = [None] * len(self.slots)
+        self.hits = 0
+        self.misses = 0
+        self.overwrites = 0
+
+    def lookup(self, key):
+        """Return (key, depth, value, flag, move) for key, or None"""
+        index = (key & self.mask) << 1
+        for entry in (self.slots[index], self.slots[index + 1]):
+            if entry is not None and entry[0] == key:
+                self.hits += 1
+                return entry
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, value, flag, move):
+        index = (key & self.mask) << 1
+        deep = self.slots[index]
+        if deep is None or deep[0] == key or depth >= deep[1]:
+            if deep is not None and deep[0] != key:
+                self.overwrites += 1
+            self.slots[index] = (key, depth, value, flag, move)
+        else:
+            recent = self.slots[index + 1]
+            if recent is not None and recent[0] != key:
+                self.overwrites += 1
+            self.slots[index + 1] = (key, depth, value, flag, move)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "overwrites": self.overwrites}
+
+
+class Solver:
+    """Exact solver for Connect-N: negamax with alpha-beta over bitboards.
+
+    Positions are (position, mask, moves): position holds the stones of the
+    side to move, mask holds every stone, using the same bit layout as
+    ConnectFour. Scores are from the side to move: positive means it wins,
+    and the sooner it wins the larger the score. 0 means a draw.
+    """
+
+    def __init__(self, rows=6, columns=7, connect=4, table_size=1048573):
+        self.rows = rows
+        self.columns = columns
+        self.connect = connect
+        self.height = rows + 1
+        self.cells = rows * columns
+        self.bottom_mask = sum(1 << (c * self.height) for c in range(columns))
+        self.board_mask = self.bottom_mask * ((1 << rows) - 1)
+        self.column_masks = [((1 << rows) - 1) << (c * self.height) for c in range(columns)]
+        center = columns // 2
+        self.move_order = sorted(range(columns), key=lambda c: abs(c - center))
+        self.min_score = -(self.cells // 2) + 3
+        # For each direction and each gap position in a line, the shifts that
+        # bring the line's other stones onto the gap cell
+        self.win_patterns = [
+            [(k - gap) * shift for k in range(connect) if k != gap]
+            for shift in (1, self.height, self.height - 1, self.height + 1)
+            for gap in range(connect)
+        ]
+        # Upper bounds keyed by position + mask, always-replace
+        self.table_size = table_size
+        self.table_keys = [-1] * table_size
+        self.table_values = [0] * table_size
+        self.nodes = 0
+
+    def winning_cells(self, position, mask):
+        """Empty cells that would complete a line for position"""
+        cells = 0
+        for offsets in self.win_patterns:
+            line = -1
+            for offset in offsets:
+                line &= position >> offset if offset > 0 else position << -offset
+            cells |= line
+        return cells & (self.board_mask ^ mask)
+
+    def possible(self, mask):
+        return (mask + self.bottom_mask) & self.board_mask
+
+    def can_win_next(self, position, mask):
+        return self.winning_cells(position, mask) & self.possible(mask) != 0
+
+    def non_losing_moves(self, position, mask):
+        """Playable cells that do not hand the opponent an immediate win"""
+        possible = self.possible(mask)
+        opponent_win = self.winning_cells(position ^ mask, mask)
+        forced = possible & opponent_win
+        if forced:
+            if forced & (forced - 1):
+                return 0  # two threats at once, nothing saves us
+            possible = forced
+        return possible & ~(opponent_win >> 1)
+
+    def negamax(self, position, mask, moves, alpha, beta):
+        self.nodes += 1
+        cells = self.cells
+        candidates = self.non_losing_moves(position, mask)
+        if candidates == 0:
+            return -((cells - moves) // 2)
+        if moves >= cells - 2:
+            return 0
+
+        lower = -((cells - 2 - moves) // 2)
+        if alpha < lower:
+            alpha = lower
+            if alpha >= beta:
+                return alpha
+        upper = (cells - 1 - moves) // 2
+        key = position + mask
+        slot = key % self.table_size
+        if self.table_keys[slot] == key:
+            upper = self.table_values[slot] + self.min_score - 1
+        if beta > upper:
+            beta = upper
+            if alpha >= beta:
+                return beta
+
+        # Try moves that create the most new threats first, center-first on ties
+        ordered = []
+        for i, c in enumerate(self.move_order):
+            move = candidates & self.column_masks[c]
+            if move:
+                threats = bin(self.winning_cells(position | move, mask | move)).count("1")
+                ordered.append((-threats, i, move))
+        ordered.sort()
+
+        opponent = position ^ mask
+        for _, _, move in ordered:
+            score = -self.negamax(opponent, mask | move, moves + 1, -beta, -alpha)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+
+        self.table_keys[slot] = key
+        self.table_values[slot] = alpha - self.min_score + 1
+        return alpha
+
+    def solve(self, position, mask, moves):
+        """Exact score of the position, found with null-window searches"""
+        if self.can_win_next(position, mask):
+            return (self.cells + 1 - moves) // 2
+        lower = -((self.cells - moves) // 2)
+        upper = (self.cells + 1 - moves) // 2
+        while lower < upper:
+            mid = lower + (upper - lower) // 2
+            if mid <= 0 and int(lower / 2) < mid:
+                mid = int(lower / 2)
+            elif mid >= 0 and int(upper / 2) > mid:
+                mid = int(upper / 2)
+            result = self.negamax(position, mask, moves, mid, mid + 1)
+            if result <= mid:
+                upper = result
+            else:
+                lower = result
+        return lower
+
+    def mirror_key(self, key):
+        """Key of the left-right mirrored position (keys never carry across columns)"""
+        h = self.height
+        column = (1 << h) - 1
+        mirrored = 0
+        for c in range(self.columns):
+            mirrored |= ((key >> (c * h)) & column) << ((self.columns - 1 - c) * h)
+        return mirrored
+
+
+class OpeningBook:
+    """Sorted (key, score) records in a .npy file, searched in place through mmap"""
+
+    DTYPE = np.dtype([("key", "<u8"), ("score", "i1")])
+
+    def __init__(self, path, solver=None):
+        self.solver = solver or Solver()
+        self.check_geometry(self.solver)
+        self.records = np.load(path, mmap_mode="r")
+        self.keys = self.records["key"]
+
+    @classmethod
+    def check_geometry(cls, solver):
+        """Keys are position + mask, one bit per cell plus a sentinel row, and must fit the key field"""
+        bits = solver.height * solver.columns
+        if bits > cls.DTYPE["key"].itemsize * 8:
+            raise ValueError(
+                f"opening book keys need {bits} bits on a {solver.height - 1}x{solver.columns} board; "
+                f"books support at most {cls.DTYPE['key'].itemsize * 8}"
+            )
+
+    def __len__(self):
+        return len(self.records)
+
+    def lookup(self, position, mask):
+        """Exact score for the side to move, or None when the position is not in the book"""
+        key = position + mask
+        key = min(key, self.solver.mirror_key(key))
+        i = int(np.searchsorted(self.keys, key))
+        if i < len(self.keys) and int(self.keys[i]) == key:
+            return int(self.records["score"][i])
+        return None
+
+
+def build_opening_book(path, max_ply, start_moves=(), solver=None, progress=True):
+    """Solve every reachable, unfinished position up to max_ply and write the book.
+
+    start_moves (0-based columns) restricts the book to the subtree below that
+    opening, which keeps builds with a pure-Python solver tractable.
+    """
+    solver = solver or Solver()
+    OpeningBook.check_geometry(solver)
+    position, mask = 0, 0
+    for ply, col in enumerate(start_moves, start=1):
+        if not 0 <= col < solver.columns:
+            raise ValueError(f"start move {ply}: column {col} is off the board")
+        move = solver.possible(mask) & solver.column_masks[col]
+        if not move:
+            raise ValueError(f"start move {ply}: column {col} is full")
+        if solver.winning_cells(position, mask) & move:
+            raise ValueError(f"start move {ply}: column {col} ends the game")
+        position, mask = position ^ mask, mask | move
+    key = position + mask
+    frontier = {min(key, solver.mirror_key(key)): (position, mask)}
+    entries = {}
+    for ply in range(len(start_moves), max_ply + 1):
+        start = time.perf_counter()
+        next_frontier = {}
+        for key, (position, mask) in frontier.items():
+            entries[key] = solver.solve(position, mask, ply)
+            if ply == max_ply:
+                continue
+            for c in range(solver.columns):
+                move = solver.possible(mask) & solver.column_masks[c]
+                if not move or solver.winning_cells(position, mask) & move:
+                    continue  # full column, or this move ends the game
+                child_position, child_mask = position ^ mask, mask | move
+                child_key = child_position + child_mask
+                child_key = min(child_key, solver.mirror_key(child_key))
+                next_frontier.setdefault(child_key, (child_position, child_mask))
+        if progress:
+            print(f"ply {ply}: {len(frontier)} positions in {time.perf_counter() - start:.1f}s")
+        frontier = next_frontier
+
+    records = np.array(sorted(entries.items()), dtype=OpeningBook.DTYPE)
+    with open(path, "wb") as f:
+        np.save(f, records)
+    return len(records)
 
 
 class ConnectFour:
-    def __init__(self):
-        self.ROW_COUNT = 6
-        self.COLUMN_COUNT = 7
-        self.board = np.zeros((self.ROW_COUNT, self.COLUMN_COUNT))
-        self.PLAYER_PIECE = 1
-        self.AI_PIECE = 2
-        self.WINDOW_LENGTH = 4
+    def __init__(
+        self,
+        tt_size_mb=16,
+        zobrist_seed=0,
+        time_limit=1.0,
+        max_nodes=None,
+        workers=1,
+        ai_piece=2,
+        book_path=None,
+        rows=6,
+        columns=7,
+        connect=4,
+        stats=None,
+    ):
+        self.ROW_COUNT = rows
+        self.COLUMN_COUNT = columns
+        # The search always maximizes for AI_PIECE; self-play gives each side
+        # its own game with the pieces swapped
+        self.AI_PIECE = ai_piece
+        self.PLAYER_PIECE = 3 - ai_piece
+        self.WINDOW_LENGTH = connect
         self.EMPTY = 0
 
+        # Bitboard layout: each column takes ROW_COUNT + 1 bits (the extra bit
+        # is a sentinel so shifted lines never wrap into the next column), and
+        # cell (r, c) lives at bit c * (ROW_COUNT + 1) + r.
+        self.COLUMN_HEIGHT = self.ROW_COUNT + 1
+        self.bitboards = {self.PLAYER_PIECE: 0, self.AI_PIECE: 0}
+        self.heights = [0] * self.COLUMN_COUNT
+        self.moves = []
+
+        # Zobrist keys per (piece, bit index); the hash is updated incrementally
+        # by drop_piece/undo_move. The table outlives a single search, so the
+        # search after move N starts with everything learned before it.
+        zobrist_rng = random.Random(zobrist_seed)
+        self.zobrist_keys = {
+            piece: [zobrist_rng.getrandbits(64) for _ in range(self.COLUMN_COUNT * self.COLUMN_HEIGHT)]
+            for piece in (self.PLAYER_PIECE, self.AI_PIECE)
+        }
+        self.zobrist_side = zobrist_rng.getrandbits(64)
+        self.zobrist_hash = 0
+        self.transposition_table = TranspositionTable(tt_size_mb) if tt_size_mb else None
+
+        # Root-parallel search: worker processes rebuild a game with these settings
+        self.workers = workers
+        self.worker_settings = {
+            "tt_size_mb": tt_size_mb,
+            "zobrist_seed": zobrist_seed,
+            "ai_piece": ai_piece,
+            "rows": rows,
+            "columns": columns,
+            "connect": connect,
+        }
+        self._pool = None
+        self._pool_workers = 0
+
+        # Search budget and move ordering. Columns are tried center-first, and
+        # the principal variation of the previous iteration before anything else.
+        self.time_limit = time_limit
+        self.max_nodes = max_nodes
+        center = self.COLUMN_COUNT // 2
+        self.move_order = sorted(range(self.COLUMN_COUNT), key=lambda c: abs(c - center))
+        # Search order for every (PV move, TT move) pair, either of which may be
+        # None, so minimax looks one up instead of reordering a list per node
+        self.move_orders = {}
+        for pv_move in (None, *self.move_order):
+            for tt_move in (None, *self.move_order):
+                first = [col for col in dict.fromkeys((pv_move, tt_move)) if col is not None]
+                self.move_orders[pv_move, tt_move] = tuple(first + [c for c in self.move_order if c not in first])
+        self.principal_variation = []
+        self.nodes = 0
+        self._deadline = None
+        self._node_limit = None
+        self._root_ply = 0
+        self._follow_pv = False
+        # SearchStats instance, or None to skip all instrumentation
+        self.stats = stats
+
+        # Incremental evaluation: per-window piece counts and running scores
+        self._build_windows()
+
+        # Exact solver and an optional precomputed opening book
+        self.solver = None
+        self.opening_book = None
+        if book_path is not None:
+            self.solver = Solver(self.ROW_COUNT, self.COLUMN_COUNT, self.WINDOW_LENGTH)
+            self.opening_book = OpeningBook(book_path, self.solver)
+
+    @property
+    def board(self):
+        """NumPy snapshot of the position, indexed as board[row][col].
+
+        For display and outside callers only; the search reads the bitboards
+        and the incremental evaluation, never this.
+        """
+        size = self.COLUMN_COUNT * self.COLUMN_HEIGHT
+        board = np.zeros(size)
+        for piece in (self.PLAYER_PIECE, self.AI_PIECE):
+            packed = np.frombuffer(self.bitboards[piece].to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+            board[np.unpackbits(packed, count=size, bitorder="little").astype(bool)] = piece
+        return board.reshape(self.COLUMN_COUNT, self.COLUMN_HEIGHT)[:, : self.ROW_COUNT].T.copy()
+
+    def piece_at(self, row, col):
+        bit = 1 << (col * self.COLUMN_HEIGHT + row)
+        if self.bitboards[self.PLAYER_PIECE] & bit:
+            return self.PLAYER_PIECE
+        if self.bitboards[self.AI_PIECE] & bit:
+            return self.AI_PIECE
+        return self.EMPTY
+
     def drop_piece(self, row, col, piece):
-        self.board[row][col] = piece
+        index = col * self.COLUMN_HEIGHT + row
+        self.bitboards[piece] |= 1 << index
+        self.zobrist_hash ^= self.zobrist_keys[piece][index]
+        self._update_evaluation(index, piece, 1)
+        self.heights[col] = row + 1
+        self.moves.append((col, piece))
+
+    def undo_move(self):
+        """Take back the most recent drop_piece"""
+        col, piece = self.moves.pop()
+        self.heights[col] -= 1
+        index = col * self.COLUMN_HEIGHT + self.heights[col]
+        self.bitboards[piece] ^= 1 << index
+        self.zobrist_hash ^= self.zobrist_keys[piece][index]
+        self._update_evaluation(index, piece, -1)
 
     def is_valid_location(self, col):
-        return self.board[self.ROW_COUNT - 1][col] == 0
+        return self.heights[col] < self.ROW_COUNT
 
     def get_next_open_row(self, col):
-        for r in range(self.ROW_COUNT):
-            if self.board[r][col] == 0:
-                return r
+        if self.heights[col] < self.ROW_COUNT:
+            return self.heights[col]
         return None
 
     def print_board(self):
@@ -43,9 +488,10 @@ class ConnectFour:
         for r in range(self.ROW_COUNT - 1, -1, -1):
             print("|", end="")
             for c in range(self.COLUMN_COUNT):
-                if self.board[r][c] == 0:
+                piece = self.piece_at(r, c)
+                if piece == self.EMPTY:
                     print(" · ", end="")
-                elif self.board[r][c] == 1:
+                elif piece == self.PLAYER_PIECE:
                     print(" X ", end="")
                 else:
                     print(" O ", end="")
@@ -53,121 +499,169 @@ class ConnectFour:
         print("-" * (self.COLUMN_COUNT * 3 + 2))
 
     def winning_move(self, piece):
-        # Horizontal
-        for c in range(self.COLUMN_COUNT - 3):
-            for r in range(self.ROW_COUNT):
-                if (
-                    self.board[r][c] == piece
-                    and self.board[r][c + 1] == piece
-                    and self.board[r][c + 2] == piece
-                    and self.board[r][c + 3] == piece
-                ):
-                    return True
-
-        # Vertical
-        for c in range(self.COLUMN_COUNT):
-            for r in range(self.ROW_COUNT - 3):
-                if (
-                    self.board[r][c] == piece
-                    and self.board[r + 1][c] == piece
-                    and self.board[r + 2][c] == piece
-                    and self.board[r + 3][c] == piece
-                ):
-                    return True
-
-        # Diagonal (positive slope)
-        for c in range(self.COLUMN_COUNT - 3):
-            for r in range(self.ROW_COUNT - 3):
-                if (
-                    self.board[r][c] == piece
-                    and self.board[r + 1][c + 1] == piece
-                    and self.board[r + 2][c + 2] == piece
-                    and self.board[r + 3][c + 3] == piece
-                ):
-                    return True
-
-        # Diagonal (negative slope)
-        for c in range(self.COLUMN_COUNT - 3):
-            for r in range(3, self.ROW_COUNT):
-                if (
-                    self.board[r][c] == piece
-                    and self.board[r - 1][c + 1] == piece
-                    and self.board[r - 2][c + 2] == piece
-                    and self.board[r - 3][c + 3] == piece
-                ):
-                    return True
-
-        return False
+        # drop_piece/undo_move keep count of the windows piece has filled,
+        # checking only the windows through the cell that changed
+        return self.completed_windows[piece] > 0
 
     def evaluate_window(self, window, piece):
         score = 0
         opp_piece = self.PLAYER_PIECE if piece == self.AI_PIECE else self.AI_PIECE
 
-        if window.count(piece) == 4:
+        L = self.WINDOW_LENGTH
+        if window.count(piece) == L:
             score += 100
-        elif window.count(piece) == 3 and window.count(self.EMPTY) == 1:
+        elif window.count(piece) == L - 1 and window.count(self.EMPTY) == 1:
             score += 5
-        elif window.count(piece) == 2 and window.count(self.EMPTY) == 2:
+        elif window.count(piece) == L - 2 and window.count(self.EMPTY) == 2:
             score += 2
 
-        if window.count(opp_piece) == 3 and window.count(self.EMPTY) == 1:
+        if window.count(opp_piece) == L - 1 and window.count(self.EMPTY) == 1:
             score -= 4
 
         return score
 
     def score_position(self, piece):
-        score = 0
+        """Heuristic score for piece, kept up to date by drop_piece/undo_move"""
+        return self.eval_scores[piece]
 
-        # Center column
-        center_array = [int(i) for i in list(self.board[:, self.COLUMN_COUNT // 2])]
-        center_count = center_array.count(piece)
-        score += center_count * 3
-
-        # Horizontal
-        for r in range(self.ROW_COUNT):
-            row_array = [int(i) for i in list(self.board[r, :])]
-            for c in range(self.COLUMN_COUNT - 3):
-                window = row_array[c : c + self.WINDOW_LENGTH]
-                score += self.evaluate_window(window, piece)
-
-        # Vertical
-        for c in range(self.COLUMN_COUNT):
-            col_array = [int(i) for i in list(self.board[:, c])]
-            for r in range(self.ROW_COUNT - 3):
-                window = col_array[r : r + self.WINDOW_LENGTH]
-                score += self.evaluate_window(window, piece)
-
-        # Diagonal (positive slope)
-        for r in range(self.ROW_COUNT - 3):
-            for c in range(self.COLUMN_COUNT - 3):
-                window = [self.board[r + i][c + i] for i in range(self.WINDOW_LENGTH)]
-                score += self.evaluate_window(window, piece)
-
-        # Diagonal (negative slope)
-        for r in range(3, self.ROW_COUNT):
-            for c in range(self.COLUMN_COUNT - 3):
-                window = [self.board[r - i][c + i] for i in range(self.WINDOW_LENGTH)]
-                score += self.evaluate_window(window, piece)
+    def _build_windows(self):
+        """Precompute every window as a tuple of bit indices, plus the windows per cell"""
+        L = self.WINDOW_LENGTH
+        self.windows = []
+        # Horizontal, vertical, diagonal (positive slope), diagonal (negative slope)
+        for dr, dc in ((0, 1), (1, 0), (1, 1), (-1, 1)):
+            for r in range(self.ROW_COUNT):
+                for c in range(self.COLUMN_COUNT):
+                    end_r, end_c = r + dr * (L - 1), c + dc * (L - 1)
+                    if 0 <= end_r < self.ROW_COUNT and end_c < self.COLUMN_COUNT:
+                        self.windows.append(
+                            tuple((c + dc * i) * self.COLUMN_HEIGHT + r + dr * i for i in range(L))
+                        )
+        self.cell_windows = [[] for _ in range(self.COLUMN_COUNT * self.COLUMN_HEIGHT)]
+        for w, window in enumerate(self.windows):
+            for index in window:
+                self.cell_windows[index].append(w)
+        self.cell_windows = [tuple(ws) for ws in self.cell_windows]
 
-        return score
+        # evaluate_window only depends on how many of each piece a window holds,
+        # so tabulate it once by (own count, opponent count)
+        self.window_scores = [
+            [
+                self.evaluate_window(
+                    [self.AI_PIECE] * own + [self.PLAYER_PIECE] * opp + [self.EMPTY] * (L - own - opp),
+                    self.AI_PIECE,
+                )
+                if own + opp <= L
+                else 0
+                for opp in range(L + 1)
+            ]
+            for own in range(L + 1)
+        ]
+        self.center_column = self.COLUMN_COUNT // 2
+        self.window_counts = {
+            self.PLAYER_PIECE: [0] * len(self.windows),
+            self.AI_PIECE: [0] * len(self.windows),
+        }
+        empty_score = len(self.windows) * self.window_scores[0][0]
+        self.eval_scores = {self.PLAYER_PIECE: empty_score, self.AI_PIECE: empty_score}
+        self.completed_windows = {self.PLAYER_PIECE: 0, self.AI_PIECE: 0}
+
+        # The same windows as flat row-major cell indices, for batched evaluation
+        self.window_cells = np.array(
+            [[(i % self.COLUMN_HEIGHT) * self.COLUMN_COUNT + i // self.COLUMN_HEIGHT for i in w] for w in self.windows],
+            dtype=np.intp,
+        ).reshape(-1, L)
+        self.window_score_table = np.array(self.window_scores, dtype=np.int64)
+
+    def score_positions(self, boards, piece):
+        """score_position for a stack of boards shaped (N, ROW_COUNT, COLUMN_COUNT)"""
+        boards = np.asarray(boards)
+        opp_piece = self.PLAYER_PIECE if piece == self.AI_PIECE else self.AI_PIECE
+        cells = boards.reshape(len(boards), self.ROW_COUNT * self.COLUMN_COUNT)[:, self.window_cells]
+        own = np.count_nonzero(cells == piece, axis=2)
+        opp = np.count_nonzero(cells == opp_piece, axis=2)
+        scores = self.window_score_table[own, opp].sum(axis=1)
+        scores += 3 * np.count_nonzero(boards[:, :, self.center_column] == piece, axis=1)
+        return scores
+
+    def winning_moves(self, boards, piece):
+        """winning_move for a stack of boards: one bool per board"""
+        boards = np.asarray(boards)
+        cells = boards.reshape(len(boards), self.ROW_COUNT * self.COLUMN_COUNT)[:, self.window_cells]
+        return (cells == piece).all(axis=2).any(axis=1)
+
+    def positions_from_moves(self, moves, first_piece=1):
+        """Every position of a game given as 0-based columns, shaped (len(moves) + 1, ROW_COUNT, COLUMN_COUNT)"""
+        boards = np.zeros((len(moves) + 1, self.ROW_COUNT, self.COLUMN_COUNT), dtype=np.int8)
+        heights = [0] * self.COLUMN_COUNT
+        piece = first_piece
+        for i, col in enumerate(moves):
+            boards[i + 1 :, heights[col], col] = piece
+            heights[col] += 1
+            piece = 3 - piece
+        return boards
+
+    def _update_evaluation(self, index, piece, delta):
+        """Apply delta (+1 drop, -1 undo) of piece at bit index to the window counts"""
+        table = self.window_scores
+        player_counts = self.window_counts[self.PLAYER_PIECE]
+        ai_counts = self.window_counts[self.AI_PIECE]
+        counts = player_counts if piece == self.PLAYER_PIECE else ai_counts
+        player_score = self.eval_scores[self.PLAYER_PIECE]
+        ai_score = self.eval_scores[self.AI_PIECE]
+        L = self.WINDOW_LENGTH
+        completed = 0
+        for w in self.cell_windows[index]:
+            player, ai = player_counts[w], ai_counts[w]
+            player_score -= table[player][ai]
+            ai_score -= table[ai][player]
+            if counts[w] == L:
+                completed -= 1
+            counts[w] += delta
+            if counts[w] == L:
+                completed += 1
+            player, ai = player_counts[w], ai_counts[w]
+            player_score += table[player][ai]
+            ai_score += table[ai][player]
+        self.completed_windows[piece] += completed
+        if index // self.COLUMN_HEIGHT == self.center_column:
+            if piece == self.PLAYER_PIECE:
+                player_score += 3 * delta
+            else:
+                ai_score += 3 * delta
+        self.eval_scores[self.PLAYER_PIECE] = player_score
+        self.eval_scores[self.AI_PIECE] = ai_score
 
     def is_terminal_node(self):
         return (
             self.winning_move(self.PLAYER_PIECE)
             or self.winning_move(self.AI_PIECE)
-            or len(self.get_valid_locations()) == 0
+            or len(self.moves) == self.ROW_COUNT * self.COLUMN_COUNT
         )
 
     def get_valid_locations(self):
-        valid_locations = []
-        for col in range(self.COLUMN_COUNT):
-            if self.is_valid_location(col):
-                valid_locations.append(col)
-        return valid_locations
+        return [col for col in range(self.COLUMN_COUNT) if self.heights[col] < self.ROW_COUNT]
+
+    def get_ordered_locations(self):
+        """Valid columns in search order (center-first)"""
+        return [col for col in self.move_order if self.heights[col] < self.ROW_COUNT]
 
     def minimax(self, depth, alpha, beta, maximizing_player):
-        valid_locations = self.get_valid_locations()
-        is_terminal = self.is_terminal_node()
+        self.nodes += 1
+        if self._node_limit is not None and self.nodes > self._node_limit:
+            raise SearchTimeout()
+        if self._deadline is not None and self.nodes & 1023 == 0 and time.perf_counter() > self._deadline:
+            raise SearchTimeout()
+
+        stats = self.stats
+        if stats is None:
+            is_terminal = self.is_terminal_node()
+        else:
+            ply = len(self.moves) - self._root_ply
+            stats.nodes_by_ply[ply] = stats.nodes_by_ply.get(ply, 0) + 1
+            started = time.perf_counter()
+            is_terminal = self.is_terminal_node()
+            stats.win_time += time.perf_counter() - started
 
         if depth == 0 or is_terminal:
             if is_terminal:
@@ -178,18 +672,72 @@ class ConnectFour:
                 else:  # Game is over, no more valid moves
                     return (None, 0)
             else:  # Depth is zero
-                return (None, self.score_position(self.AI_PIECE))
+                if stats is None:
+                    return (None, self.score_position(self.AI_PIECE))
+                started = time.perf_counter()
+                value = self.score_position(self.AI_PIECE)
+                stats.eval_time += time.perf_counter() - started
+                return (None, value)
+
+        table = self.transposition_table
+        key = self.zobrist_hash ^ self.zobrist_side if maximizing_player else self.zobrist_hash
+        alpha_orig, beta_orig = alpha, beta
+        tt_move = None
+        if table is not None:
+            entry = table.lookup(key)
+            if stats is not None:
+                stats.tt_probes += 1
+                stats.tt_hits += entry is not None
+            if entry is not None:
+                _, entry_depth, entry_value, entry_flag, entry_move = entry
+                if entry_depth >= depth:
+                    if entry_flag == TranspositionTable.EXACT:
+                        if stats is not None:
+                            stats.tt_cutoffs += 1
+                        return entry_move, entry_value
+                    elif entry_flag == TranspositionTable.LOWER_BOUND:
+                        alpha = max(alpha, entry_value)
+                    else:
+                        beta = min(beta, entry_value)
+                    if alpha >= beta:
+                        if stats is not None:
+                            stats.tt_cutoffs += 1
+                        return entry_move, entry_value
+                # Search the stored best move first
+                tt_move = entry_move
+
+        # Along the previous iteration's principal variation its move goes first
+        follow_pv = self._follow_pv
+        pv_move = None
+        if follow_pv:
+            ply = len(self.moves) - self._root_ply
+            if ply < len(self.principal_variation):
+                pv_move = self.principal_variation[ply]
+
+        if stats is None:
+            order = self.move_orders[pv_move, tt_move]
+        else:
+            started = time.perf_counter()
+            order = self.move_orders[pv_move, tt_move]
+            stats.movegen_time += time.perf_counter() - started
+        # Full columns are skipped as they come up; the board is not full, so
+        # the first column searched always sets value and column
+        heights = self.heights
+        rows = self.ROW_COUNT
+        i = 0
 
         if maximizing_player:
             value = float("-inf")
-            column = random.choice(valid_locations)
+            column = None
 
-            for col in valid_locations:
-                row = self.get_next_open_row(col)
-                temp_board = self.board.copy()
+            for col in order:
+                row = heights[col]
+                if row == rows:
+                    continue
                 self.drop_piece(row, col, self.AI_PIECE)
+                self._follow_pv = follow_pv and col == pv_move
                 new_score = self.minimax(depth - 1, alpha, beta, False)[1]
-                self.board = temp_board
+                self.undo_move()
 
                 if new_score > value:
                     value = new_score
@@ -197,20 +745,24 @@ class ConnectFour:
 
                 alpha = max(alpha, value)
                 if alpha >= beta:
+                    if stats is not None:
+                        stats.beta_cutoffs += 1
+                        stats.first_move_cutoffs += i == 0
                     break
-
-            return column, value
+                i += 1
 
         else:  # Minimizing player
             value = float("inf")
-            column = random.choice(valid_locations)
+            column = None
 
-            for col in valid_locations:
-                row = self.get_next_open_row(col)
-                temp_board = self.board.copy()
+            for col in order:
+                row = heights[col]
+                if row == rows:
+                    continue
                 self.drop_piece(row, col, self.PLAYER_PIECE)
+                self._follow_pv = follow_pv and col == pv_move
                 new_score = self.minimax(depth - 1, alpha, beta, True)[1]
-                self.board = temp_board
+                self.undo_move()
 
                 if new_score < value:
                     value = new_score
@@ -218,9 +770,182 @@ class ConnectFour:
 
                 beta = min(beta, value)
                 if alpha >= beta:
+                    if stats is not None:
+                        stats.beta_cutoffs += 1
+                        stats.first_move_cutoffs += i == 0
+                    break
+                i += 1
+
+        if table is not None:
+            if value <= alpha_orig:
+                flag = TranspositionTable.UPPER_BOUND
+            elif value >= beta_orig:
+                flag = TranspositionTable.LOWER_BOUND
+            else:
+                flag = TranspositionTable.EXACT
+            table.store(key, depth, value, flag, column)
+
+        return column, value
+
+    def _extract_principal_variation(self, first_move, depth):
+        """Follow best moves through the transposition table from the root"""
+        pv = [first_move]
+        if self.transposition_table is None:
+            return pv
+        root_ply = len(self.moves)
+        maximizing_player = True
+        col = first_move
+        while len(pv) <= depth and col is not None and self.is_valid_location(col):
+            piece = self.AI_PIECE if maximizing_player else self.PLAYER_PIECE
+            self.drop_piece(self.get_next_open_row(col), col, piece)
+            if self.winning_move(piece):
+                break
+            maximizing_player = not maximizing_player
+            key = self.zobrist_hash ^ self.zobrist_side if maximizing_player else self.zobrist_hash
+            slots = self.transposition_table.slots
+            index = (key & self.transposition_table.mask) << 1
+            col = None
+            for entry in (slots[index], slots[index + 1]):
+                if entry is not None and entry[0] == key:
+                    col = entry[4]
+                    pv.append(col)
                     break
+        while len(self.moves) > root_ply:
+            self.undo_move()
+        return pv[:depth]
+
+    def parallel_minimax(self, depth, workers=None):
+        """Fixed-depth AI search with the root moves split across worker processes.
+
+        Young Brothers Wait at the root: the first move is searched here to get
+        a bound, then the remaining moves are searched in parallel against it.
+        Ties are broken in move order, so the chosen move is the same as
+        minimax(depth, -inf, inf, True) from the same table state.
+        """
+        workers = workers or self.workers
+        pv_move = self.principal_variation[0] if self._follow_pv and self.principal_variation else None
+        valid_locations = [col for col in self.move_orders[pv_move, None] if self.is_valid_location(col)]
+        if workers <= 1 or depth <= 1 or len(valid_locations) <= 1 or self.is_terminal_node():
+            return self.minimax(depth, float("-inf"), float("inf"), True)
+
+        if self._pool is None or self._pool_workers != workers:
+            self.close_pool()
+            self._pool = ProcessPoolExecutor(max_workers=workers)
+            self._pool_workers = workers
+
+        best_col = valid_locations[0]
+        self.drop_piece(self.get_next_open_row(best_col), best_col, self.AI_PIECE)
+        best_value = self.minimax(depth - 1, float("-inf"), float("inf"), False)[1]
+        self.undo_move()
 
-            return column, value
+        time_left = self._deadline - time.perf_counter() if self._deadline is not None else None
+        nodes_left = self._node_limit - self.nodes if self._node_limit is not None else None
+        futures = [
+            self._pool.submit(
+                _search_root_move,
+                self.worker_settings,
+                list(self.moves),
+                col,
+                depth,
+                best_value,
+                time_left,
+                nodes_left,
+            )
+            for col in valid_locations[1:]
+        ]
+        results = [future.result() for future in futures]
+        for col, value, nodes in results:
+            self.nodes += nodes
+            if value is None:
+                raise SearchTimeout()
+            if value > best_value:
+                best_col, best_value = col, value
+        return best_col, best_value
+
+    def solve(self, piece=None):
+        """Exact game value for piece (default: the side to move), see Solver"""
+        if piece is None:
+            piece = 3 - self.moves[-1][1] if self.moves else self.PLAYER_PIECE
+        if self.solver is None:
+            self.solver = Solver(self.ROW_COUNT, self.COLUMN_COUNT, self.WINDOW_LENGTH)
+        mask = self.bitboards[self.PLAYER_PIECE] | self.bitboards[self.AI_PIECE]
+        return self.solver.solve(self.bitboards[piece], mask, len(self.moves))
+
+    def book_move(self):
+        """Best AI move according to the opening book, or None when out of book"""
+        if self.opening_book is None:
+            return None
+        best_col, best_score = None, None
+        for col in self.get_ordered_locations():
+            self.drop_piece(self.get_next_open_row(col), col, self.AI_PIECE)
+            if self.winning_move(self.AI_PIECE):
+                self.undo_move()
+                return col
+            mask = self.bitboards[self.PLAYER_PIECE] | self.bitboards[self.AI_PIECE]
+            score = self.opening_book.lookup(self.bitboards[self.PLAYER_PIECE], mask)
+            self.undo_move()
+            if score is None:
+                return None
+            if best_score is None or -score > best_score:
+                best_col, best_score = col, -score
+        return best_col
+
+    def close_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def iterative_deepening(self, time_limit=None, max_nodes=None, max_depth=None):
+        """Search depth 1, 2, 3, ... for the AI until the time or node budget runs out.
+
+        Returns (column, value, depth) from the deepest completed iteration.
+        """
+        if time_limit is None:
+            time_limit = self.time_limit
+        if max_nodes is None:
+            max_nodes = self.max_nodes
+        empty_cells = self.ROW_COUNT * self.COLUMN_COUNT - len(self.moves)
+        if max_depth is None or max_depth > empty_cells:
+            max_depth = empty_cells
+
+        self.nodes = 0
+        if self.stats is not None:
+            self.stats.reset()
+        started = time.perf_counter()
+        self._deadline = started + time_limit if time_limit is not None else None
+        self._node_limit = max_nodes
+        self._root_ply = len(self.moves)
+        self.principal_variation = []
+        best = (self.get_ordered_locations()[0], 0, 0)
+        try:
+            for depth in range(1, max_depth + 1):
+                self._follow_pv = True
+                if self.workers > 1:
+                    col, value = self.parallel_minimax(depth)
+                else:
+                    col, value = self.minimax(depth, float("-inf"), float("inf"), True)
+                best = (col, value, depth)
+                self.principal_variation = self._extract_principal_variation(col, depth)
+                # A forced win or loss will not change with more depth
+                if abs(value) >= 10000000000000:
+                    break
+        except SearchTimeout:
+            while len(self.moves) > self._root_ply:
+                self.undo_move()
+        finally:
+            self._deadline = None
+            self._node_limit = None
+            self._follow_pv = False
+        if self.stats is not None:
+            self.stats.record_move(
+                ply=len(self.moves),
+                column=best[0],
+                value=best[1],
+                depth=best[2],
+                seconds=time.perf_counter() - started,
+                principal_variation=self.principal_variation,
+            )
+        return best
 
     def play_game(self):
         game_over = False
@@ -234,8 +959,8 @@ class ConnectFour:
                 valid_move = False
                 while not valid_move:
                     try:
-                        col = int(input("Choose column (1-7): ")) - 1
-                        if 0 <= col <= 6:
+                        col = int(input(f"Choose column (1-{self.COLUMN_COUNT}): ")) - 1
+                        if 0 <= col < self.COLUMN_COUNT:
                             if self.is_valid_location(col):
                                 row = self.get_next_open_row(col)
                                 self.drop_piece(row, col, self.PLAYER_PIECE)
@@ -243,9 +968,9 @@ class ConnectFour:
                             else:
                                 print("Column is full! Try again.")
                         else:
-                            print("Invalid column! Choose between 1 and 7.")
+                            print(f"Invalid column! Choose between 1 and {self.COLUMN_COUNT}.")
                     except ValueError:
-                        print("Invalid input! Enter a number between 1 and 7.")
+                        print(f"Invalid input! Enter a number between 1 and {self.COLUMN_COUNT}.")
 
                 if self.winning_move(self.PLAYER_PIECE):
                     self.print_board()
@@ -254,8 +979,9 @@ class ConnectFour:
 
             else:  # AI's turn
                 print("\nAI is thinking...")
-                time.sleep(1)  # Add a small delay to make it feel more natural
-                col, minimax_score = self.minimax(5, float("-inf"), float("inf"), True)
+                col = self.book_move()
+                if col is None:
+                    col, minimax_score, _ = self.iterative_deepening()
 
                 if self.is_valid_location(col):
                     row = self.get_next_open_row(col)
@@ -274,18 +1000,138 @@ class ConnectFour:
             turn = (turn + 1) % 2
 
 
+# Per-process games reused by worker searches, one per settings, so their
+# transposition tables stay warm across searches
+_worker_games = {}
+
+
+def worker_game(settings, moves):
+    """This process's game for settings, replayed to moves ((column, piece) pairs)"""
+    key = tuple(sorted(settings.items()))
+    game = _worker_games.get(key)
+    if game is None:
+        game = _worker_games[key] = ConnectFour(**settings)
+    while game.moves:
+        game.undo_move()
+    for col, piece in moves:
+        game.drop_piece(game.get_next_open_row(col), col, piece)
+    return game
+
+
+def _search_root_move(settings, moves, col, depth, alpha, time_left, max_nodes):
+    """Search one AI root move in a worker process; value is None on timeout"""
+    game = worker_game(settings, moves)
+    game.nodes = 0
+    game._deadline = time.perf_counter() + time_left if time_left is not None else None
+    game._node_limit = max_nodes
+    game._root_ply = len(game.moves)
+    game._follow_pv = False
+    game.drop_piece(game.get_next_open_row(col), col, game.AI_PIECE)
+    try:
+        value = game.minimax(depth - 1, alpha, float("inf"), False)[1]
+    except SearchTimeout:
+        value = None
+    finally:
+        game._deadline = None
+        game._node_limit = None
+    return col, value, game.nodes
+
+
+def benchmark_parallel_search(depth, worker_counts=None, moves=()):
+    """Time a fixed-depth search for each worker count and print the speedup"""
+    if worker_counts is None:
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= (os.cpu_count() or 1):
+            worker_counts.append(worker_counts[-1] * 2)
+    print(f"Depth {depth} search, {len(moves)} moves played")
+    print(f"{'workers':>8} {'column':>7} {'seconds':>9} {'speedup':>8}")
+    baseline = None
+    for workers in worker_counts:
+        game = ConnectFour(workers=workers)
+        for col in moves:
+            piece = game.PLAYER_PIECE if len(game.moves) % 2 == 0 else game.AI_PIECE
+            game.drop_piece(game.get_next_open_row(col), col, piece)
+        # Start the pool before timing so process startup is not counted
+        if workers > 1:
+            game._pool = ProcessPoolExecutor(max_workers=workers)
+            game._pool_workers = workers
+        start = time.perf_counter()
+        col, _ = game.parallel_minimax(depth)
+        elapsed = time.perf_counter() - start
+        game.close_pool()
+        if baseline is None:
+            baseline = (col, elapsed)
+        elif col != baseline[0]:
+            print(f"warning: {workers} workers chose column {col + 1}, serial chose {baseline[0] + 1}")
+        print(f"{workers:>8} {col + 1:>7} {elapsed:>9.3f} {baseline[1] / elapsed:>8.2f}")
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play Connect Four against a minimax AI")
+    parser.add_argument("--workers", type=int, default=1, help="processes for the AI search")
+    parser.add_argument("--rows", type=int, default=6)
+    parser.add_argument("--columns", type=int, default=7)
+    parser.add_argument("--connect", type=int, default=4, help="pieces in a row needed to win")
+    parser.add_argument(
+        "--bench-parallel",
+        type=int,
+        metavar="DEPTH",
+        help="report parallel search speedup per worker count at DEPTH and exit",
+    )
+    parser.add_argument("--trace", metavar="FILE", help="append per-move search statistics to FILE as JSON lines")
+    parser.add_argument("--book", help="opening book file to play from (or to write with --build-book)")
+    parser.add_argument(
+        "--book-from",
+        default="",
+        metavar="MOVES",
+        help="build the book below this opening, as 1-based column digits (e.g. 4444)",
+    )
+    parser.add_argument(
+        "--build-book",
+        type=int,
+        metavar="PLY",
+        help="solve every position up to PLY moves, write it to --book and exit",
+    )
+    args = parser.parse_args()
+    if args.bench_parallel:
+        benchmark_parallel_search(args.bench_parallel, moves=(3, 3, 2))
+        raise SystemExit
+    if args.build_book is not None:
+        if not args.book_from.isdigit() and args.book_from:
+            parser.error("--book-from takes column digits, e.g. 4444")
+        start_moves = [int(ch) - 1 for ch in args.book_from]
+        solver = Solver(args.rows, args.columns, args.connect)
+        try:
+            count = build_opening_book(args.book or "connect4-book.npy", args.build_book, start_moves, solver)
+        except ValueError as error:
+            parser.error(str(error))
+        print(f"Wrote {count} positions to {args.book or 'connect4-book.npy'}")
+        raise SystemExit
+    if args.book:
+        try:
+            OpeningBook.check_geometry(Solver(args.rows, args.columns, args.connect))
+        except ValueError as error:
+            parser.error(str(error))
+
     while True:
         clear_screen()
         print("Welcome to Connect Four!")
         print("\nRules:")
-        print("- Connect 4 pieces vertically, horizontally, or diagonally to win")
+        print(f"- Connect {args.connect} pieces vertically, horizontally, or diagonally to win")
         print("- You are X, AI is O")
-        print("- Choose a column number between 1-7 to drop your piece")
+        print(f"- Choose a column number between 1-{args.columns} to drop your piece")
         input("\nPress Enter to start...")
 
-        game = ConnectFour()
+        game = ConnectFour(
+            workers=args.workers,
+            book_path=args.book,
+            rows=args.rows,
+            columns=args.columns,
+            connect=args.connect,
+            stats=SearchStats(args.trace) if args.trace else None,
+        )
         game.play_game()
+        game.close_pool()
 
         play_again = input("\nWould you like to play again? (y/n): ").lower()
         if play_again != "y":
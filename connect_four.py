@@ -0,0 +1,14 @@
+import importlib.util
+import os
+import sys
+
+# connect-4.py keeps its original script name, which is not importable.
+# Importing this module loads it by path and puts it in this module's place,
+# so `from connect_four import ConnectFour` works in the other scripts and
+# classes pickled for worker processes resolve there too.
+_spec = importlib.util.spec_from_file_location(
+    __name__, os.path.join(os.path.dirname(os.path.abspath(__file__)), "connect-4.py")
+)
+_module = importlib.util.module_from_spec(_spec)
+sys.modules[__name__] = _module
+_spec.loader.exec_module(_module)
@@ -0,0 +1,824 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+
+import quasi_random
+
+# Streaming Monte Carlo integration shared by the area scripts and notebooks.
+#
+# Samples are drawn and evaluated a chunk at a time, and only running sums
+# survive a chunk, so memory is set by chunk_size however many samples are
+# taken. Two estimators:
+#     integrate(f, box, n):       volume * mean of f over uniform points
+#     area(inside, box, n):       volume * fraction of points where inside is True
+# f and inside take one array per dimension, e.g. inside(x, y).
+#
+# Randomness is reproducible without global state: the n samples are cut
+# into fixed blocks of chunk_size, and block i draws from its own Generator
+# seeded by child i of one root SeedSequence. Each block reports only
+# (count, mean, m2), and blocks are reduced in index order, so a seed gives
+# bit-identical results whether one process or many do the work.
+
+DEFAULT_CHUNK = 1 << 18
+
+
+class Box:
+    """Axis-aligned integration domain [lows[i], highs[i]] in each dimension"""
+
+    def __init__(self, lows, highs):
+        self.lows = np.atleast_1d(np.asarray(lows, dtype=float))
+        self.highs = np.atleast_1d(np.asarray(highs, dtype=float))
+        if self.lows.shape != self.highs.shape or np.any(self.highs < self.lows):
+            raise ValueError("lows and highs must have the same length and highs >= lows")
+        self.dim = len(self.lows)
+        self.volume = float(np.prod(self.highs - self.lows))
+
+    def scale(self, unit):
+        """Map (dim, n) points in the unit cube into the box"""
+        return self.lows[:, None] + (self.highs - self.lows)[:, None] * unit
+
+    def sample(self, rng, n):
+        return self.scale(rng.random((self.dim, n)))
+
+
+class RunningMoments:
+    """Count, mean and sum of squared deviations, updated a chunk at a time.
+
+    Chunks are merged with Chan et al.'s pairwise update (Welford's update
+    when the chunk is one value), which stays accurate where the textbook
+    sum / sum-of-squares formula cancels catastrophically.
+    """
+
+    def __init__(self, count=0, mean=0.0, m2=0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, values):
+        values = np.asarray(values, dtype=float)
+        if values.size:
+            mean = float(values.mean())
+            self.merge(RunningMoments(values.size, mean, float(np.square(values - mean).sum())))
+
+    def merge(self, other):
+        count = self.count + other.count
+        if not other.count:
+            return self
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        return self
+
+    @property
+    def variance(self):
+        """Unbiased sample variance"""
+        return self.m2 / (self.count - 1) if self.count > 1 else float("nan")
+
+    @property
+    def std_error(self):
+        """Standard error of the mean"""
+        return float(np.sqrt(self.variance / self.count)) if self.count > 1 else float("nan")
+
+
+class Reservoir:
+    """Uniform random sample of at most size (point, value) pairs from a stream.
+
+    Each streamed point gets a random key and the size smallest keys are
+    kept, so a whole chunk is handled with one partition, and reservoirs
+    filled from different parts of the stream merge exactly.
+    """
+
+    def __init__(self, size, dim):
+        self.size = size
+        self.keys = np.empty(0)
+        self.points = np.empty((dim, 0))
+        self.values = np.empty(0)
+
+    def add(self, points, values, keys):
+        if len(self.keys) == self.size:
+            # Only points that beat the current worst kept key can get in
+            better = keys < self.keys.max()
+            keys, points, values = keys[better], points[:, better], values[better]
+        keys = np.concatenate((self.keys, keys))
+        points = np.concatenate((self.points, points), axis=1)
+        values = np.concatenate((self.values, values))
+        if len(keys) > self.size:
+            keep = np.argpartition(keys, self.size - 1)[: self.size]
+            keys, points, values = keys[keep], points[:, keep], values[keep]
+        self.keys, self.points, self.values = keys, points, values
+
+    def merge(self, other):
+        self.add(other.points, other.values, other.keys)
+
+
+def block_seed(root, index):
+    """SeedSequence of block index; the same child root.spawn() would hand out"""
+    return np.random.SeedSequence(root.entropy, spawn_key=root.spawn_key + (index,))
+
+
+# Child index reserved for pilot runs (fitting proposals and control
+# coefficients), far past any block index
+PILOT_STREAM = 2**32 - 1
+
+
+def pilot_rng(root):
+    return np.random.default_rng(block_seed(root, PILOT_STREAM))
+
+
+# Estimators. Each turns a block of random numbers into independent, equally
+# weighted contributions whose mean times scale(box) estimates the integral;
+# per_value samples (evaluations of f) go into each contribution. Keeping
+# contributions i.i.d. lets every estimator share the block streams, process
+# pool and running moments above, and gives the standard error directly.
+
+
+class SampleMean:
+    """Uniform points in the box; a contribution is f at one point"""
+
+    per_value = 1
+
+    def scale(self, box):
+        return box.volume
+
+    def values(self, func, box, rng, count):
+        points = box.sample(rng, count)
+        return points, np.asarray(func(*points), dtype=float)
+
+
+class HitOrMiss(SampleMean):
+    """Uniform points in the box; a contribution is 1 inside the region and 0 outside"""
+
+    def values(self, func, box, rng, count):
+        points = box.sample(rng, count)
+        return points, func(*points).astype(float)
+
+
+class Antithetic(SampleMean):
+    """Pairs u and 1 - u; a contribution is the pair's average. Cancels the
+    linear part of f, so it helps most when f is monotone along each axis."""
+
+    per_value = 2
+
+    def values(self, func, box, rng, count):
+        unit = rng.random((box.dim, count // self.per_value))
+        return None, (np.asarray(func(*box.scale(unit)), dtype=float) + func(*box.scale(1 - unit))) / 2
+
+
+class ControlVariate(SampleMean):
+    """f - beta * (g - mean of g), where g has a known integral over the box.
+    beta is fitted on a pilot sample, which keeps the estimate unbiased."""
+
+    def __init__(self, g, g_integral, beta):
+        self.g = g
+        self.g_integral = g_integral
+        self.beta = beta
+
+    def values(self, func, box, rng, count):
+        points = box.sample(rng, count)
+        g_mean = self.g_integral / box.volume
+        return None, np.asarray(func(*points), dtype=float) - self.beta * (self.g(*points) - g_mean)
+
+
+class Stratified(SampleMean):
+    """The box is cut into strata_per_dim ** dim equal cells. A contribution is
+    one sweep: one uniform point in every cell, averaged."""
+
+    def __init__(self, strata_per_dim, dim):
+        self.strata_per_dim = strata_per_dim
+        self.per_value = strata_per_dim**dim
+        # Lower corner of every cell in grid units, (dim, cells)
+        self.corners = np.stack(np.unravel_index(np.arange(self.per_value), (strata_per_dim,) * dim))
+
+    def values(self, func, box, rng, count):
+        sweeps = count // self.per_value
+        unit = (self.corners[:, None, :] + rng.random((box.dim, sweeps, self.per_value))) / self.strata_per_dim
+        values = np.asarray(func(*box.scale(unit.reshape(box.dim, -1))), dtype=float)
+        return None, values.reshape(sweeps, self.per_value).mean(axis=1)
+
+
+class LatinHypercube(SampleMean):
+    """Replicates of size points: each axis is cut into that many slices and
+    every slice holds exactly one point. A contribution is one replicate's mean."""
+
+    def __init__(self, points):
+        self.per_value = points
+
+    def values(self, func, box, rng, count):
+        replicates, size = count // self.per_value, self.per_value
+        # An independent random permutation of the slices per axis and replicate
+        slices = np.argsort(rng.random((box.dim, replicates, size)), axis=2)
+        unit = (slices + rng.random((box.dim, replicates, size))) / size
+        values = np.asarray(func(*box.scale(unit.reshape(box.dim, -1))), dtype=float)
+        return None, values.reshape(replicates, size).mean(axis=1)
+
+
+class QuasiRandom(SampleMean):
+    """Randomized quasi-Monte Carlo: a contribution is the mean of f over the
+    first points points of an independent randomization of sequence (a
+    quasi_random sequence). Replicas are i.i.d. however well each one is
+    balanced, so the spread between them is an honest standard error."""
+
+    def __init__(self, sequence, points):
+        self.sequence = sequence
+        self.per_value = points
+
+    def values(self, func, box, rng, count):
+        means = np.empty(count // self.per_value)
+        for replica in range(len(means)):
+            sequence = self.sequence.randomized(rng)
+            # A long replica is evaluated one index range at a time, so memory
+            # stays at a chunk however many points it has
+            total = 0.0
+            for start in range(0, self.per_value, DEFAULT_CHUNK):
+                unit = sequence.points(start, min(DEFAULT_CHUNK, self.per_value - start))
+                total += float(np.sum(func(*box.scale(unit)), dtype=float))
+            means[replica] = total / self.per_value
+        return None, means
+
+
+class HistogramProposal:
+    """Importance density on the box that is a product of per-axis
+    histograms: along each axis, bin j is picked with probability probs[j]
+    and the point is uniform within it."""
+
+    TABLE_SIZE = 4096
+
+    def __init__(self, box, edges, probs):
+        self.box = box
+        self.edges = [np.asarray(e, dtype=float) for e in edges]
+        self.probs = [np.asarray(p, dtype=float) / np.sum(p) for p in probs]
+        self.cumulative = [np.cumsum(p) for p in self.probs]
+        self.densities = [p / np.diff(e) for p, e in zip(self.probs, self.edges)]
+        # For sampling: where each bin's probability starts, and a table that
+        # puts u within a bin or two of the right one without a binary search
+        self.starts = [c - p for c, p in zip(self.cumulative, self.probs)]
+        self.tables = [np.searchsorted(c, np.arange(self.TABLE_SIZE) / self.TABLE_SIZE, side="right") for c in self.cumulative]
+
+    @classmethod
+    def fit(cls, func, box, rng, pilot=20000, bins=64, floor=0.05):
+        """Fit each axis to the marginal of |f| on a uniform pilot sample.
+        floor mixes in that share of the uniform density so no bin is starved
+        and the weights f / q stay bounded."""
+        points = box.sample(rng, pilot)
+        weight = np.abs(np.asarray(func(*points), dtype=float))
+        edges, probs = [], []
+        for axis in range(box.dim):
+            axis_edges = np.linspace(box.lows[axis], box.highs[axis], bins + 1)
+            mass, _ = np.histogram(points[axis], bins=axis_edges, weights=weight)
+            mass = mass / mass.sum() if mass.sum() > 0 else np.full(bins, 1 / bins)
+            edges.append(axis_edges)
+            probs.append((1 - floor) * mass + floor / bins)
+        return cls(box, edges, probs)
+
+    def sample(self, rng, count):
+        """(dim, count) points drawn from the density"""
+        return self.sample_with_density(rng, count)[0]
+
+    def sample_with_density(self, rng, count):
+        """Points and their density, which comes free with the bins they were drawn from"""
+        points = np.empty((self.box.dim, count))
+        density = np.ones(count)
+        for axis in range(self.box.dim):
+            edges, cumulative, probs = self.edges[axis], self.cumulative[axis], self.probs[axis]
+            # One uniform picks the bin and, rescaled within it, the offset
+            u = rng.random(count)
+            bins = self.tables[axis][(u * self.TABLE_SIZE).astype(np.intp)]
+            last = len(cumulative) - 1
+            np.minimum(bins, last, out=bins)
+            while True:
+                ahead = (u >= cumulative[bins]) & (bins < last)
+                if not ahead.any():
+                    break
+                bins[ahead] += 1
+            offset = np.clip((u - self.starts[axis][bins]) / probs[bins], 0.0, 1.0)
+            low = edges[bins]
+            points[axis] = low + offset * (edges[bins + 1] - low)
+            density *= self.densities[axis][bins]
+        return points, density
+
+    def pdf(self, *points):
+        density = np.ones(len(points[0]))
+        for axis, (edges, densities) in enumerate(zip(self.edges, self.densities)):
+            bins = np.clip(np.searchsorted(edges, points[axis], side="right") - 1, 0, len(densities) - 1)
+            inside = (points[axis] >= edges[0]) & (points[axis] <= edges[-1])
+            density *= np.where(inside, densities[bins], 0.0)
+        return density
+
+
+class Importance:
+    """Points from proposal (anything with sample(rng, n) -> (dim, n) and
+    pdf(*points)); a contribution is f(x) / q(x), zero outside the box"""
+
+    per_value = 1
+
+    def __init__(self, proposal):
+        self.proposal = proposal
+
+    def scale(self, box):
+        return 1.0
+
+    def values(self, func, box, rng, count):
+        if hasattr(self.proposal, "sample_with_density"):
+            points, density = self.proposal.sample_with_density(rng, count)
+        else:
+            points = self.proposal.sample(rng, count)
+            density = self.proposal.pdf(*points)
+        inside = np.all((points >= box.lows[:, None]) & (points <= box.highs[:, None]), axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values = np.where(inside & (density > 0), np.asarray(func(*points), dtype=float) / density, 0.0)
+        return points, values
+
+
+def _run_blocks(estimator, func, box, n, chunk_size, root, first, last, reservoir):
+    """Evaluate blocks first..last-1; returns one (count, mean, m2) per block and a reservoir"""
+    partials = []
+    sample = Reservoir(reservoir, box.dim) if reservoir else None
+    for index in range(first, last):
+        seed = block_seed(root, index)
+        # The reservoir keys come from a child stream so keeping one does not change the estimate
+        point_rng, key_rng = np.random.default_rng(seed), np.random.default_rng(seed.spawn(1)[0])
+        count = min(chunk_size, n - index * chunk_size)
+        points, values = estimator.values(func, box, point_rng, count)
+        block = RunningMoments()
+        block.add(values)
+        partials.append((block.count, block.mean, block.m2))
+        if sample is not None and points is not None:
+            sample.add(points, values, key_rng.random(len(values)))
+    return partials, sample
+
+
+def _root(seed):
+    return seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+
+def _block_size(estimator, chunk_size):
+    """Blocks hold whole contributions"""
+    return estimator.per_value * max(1, chunk_size // estimator.per_value)
+
+
+def _run_range(pool, workers, estimator, func, box, n, chunk_size, root, first, last, reservoir):
+    """Blocks first..last-1, inline or split across the pool; parts in block order"""
+    if pool is None or last - first <= 1:
+        return [_run_blocks(estimator, func, box, n, chunk_size, root, first, last, reservoir)]
+    # A few ranges per worker keeps them all busy to the end
+    bounds = np.linspace(first, last, min(last - first, 4 * workers) + 1).astype(int)
+    futures = [
+        pool.submit(_run_blocks, estimator, func, box, n, chunk_size, root, low, high, reservoir)
+        for low, high in zip(bounds[:-1], bounds[1:])
+    ]
+    return [future.result() for future in futures]
+
+
+def _reduce(parts, moments, sample):
+    for partials, part_sample in parts:
+        for count, mean, m2 in partials:
+            moments.merge(RunningMoments(count, mean, m2))
+        if sample is not None:
+            sample.merge(part_sample)
+
+
+def _run(estimator, func, box, n, chunk_size, seed, reservoir, workers):
+    root = _root(seed)
+    chunk_size = _block_size(estimator, chunk_size)
+    # A remainder too small for one contribution is not drawn
+    n -= n % estimator.per_value
+    blocks = -(-n // chunk_size)
+    moments = RunningMoments()
+    sample = Reservoir(reservoir, box.dim) if reservoir else None
+    if workers == 1 or blocks <= 1:
+        _reduce(_run_range(None, 1, estimator, func, box, n, chunk_size, root, 0, blocks, reservoir), moments, sample)
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = _run_range(pool, workers, estimator, func, box, n, chunk_size, root, 0, blocks, reservoir)
+        _reduce(parts, moments, sample)
+    return moments, sample, root
+
+
+def _result(estimator, moments, box, sample, root, elapsed):
+    scale = estimator.scale(box)
+    result = {
+        "estimate": scale * moments.mean,
+        "std_error": scale * moments.std_error,
+        "samples": moments.count * estimator.per_value,
+        "mean": moments.mean,
+        "variance": moments.variance,
+        "seconds": elapsed,
+        "seed": root.entropy,
+    }
+    if sample is not None:
+        result["points"] = sample.points
+        result["values"] = sample.values
+    return result
+
+
+def _estimate(estimator, func, box, n, chunk_size, seed, reservoir=0, workers=1):
+    start = time.perf_counter()
+    moments, sample, root = _run(estimator, func, box, n, chunk_size, seed, reservoir, workers)
+    return _result(estimator, moments, box, sample, root, time.perf_counter() - start)
+
+
+def integrate(f, box, n, chunk_size=DEFAULT_CHUNK, seed=None, reservoir=0, workers=1):
+    """Sample-mean estimate of the integral of f over box from n uniform points.
+
+    Returns a dict with the estimate, its standard error, the sample count,
+    running moments of f and the root "seed" entropy (pass it back as seed to
+    repeat the run). With reservoir > 0 it also holds a uniform sample of up
+    to that many "points" (dim, k) and their f "values", for plotting.
+    workers > 1 (or None for every core) runs blocks in a process pool; f
+    must then be picklable, i.e. a module-level function.
+
+    The variance-reduction estimators below take the same arguments and
+    return the same dict.
+    """
+    return _estimate(SampleMean(), f, box, n, chunk_size, seed, reservoir, workers)
+
+
+def area(inside, box, n, chunk_size=DEFAULT_CHUNK, seed=None, reservoir=0, workers=1):
+    """Hit-or-miss estimate of the measure of {inside} within box; the result
+    also counts the "hits". Reservoir "values" are 1 for hits and 0 for misses."""
+    result = _estimate(HitOrMiss(), inside, box, n, chunk_size, seed, reservoir, workers)
+    result["hits"] = int(round(result["mean"] * result["samples"]))
+    return result
+
+
+def importance(f, box, n, chunk_size=DEFAULT_CHUNK, seed=None, reservoir=0, workers=1, proposal=None, pilot=20000):
+    """Importance sampling from proposal, by default a HistogramProposal fitted
+    to |f| on a pilot run of pilot extra evaluations (counted in "pilot_samples")"""
+    root = _root(seed)
+    fitted = proposal is None
+    if fitted:
+        proposal = HistogramProposal.fit(f, box, pilot_rng(root), pilot)
+    result = _estimate(Importance(proposal), f, box, n, chunk_size, root, reservoir, workers)
+    result["pilot_samples"] = pilot if fitted else 0
+    return result
+
+
+def antithetic(f, box, n, chunk_size=DEFAULT_CHUNK, seed=None, workers=1):
+    """Antithetic pairs u, 1 - u in the unit cube, mapped into the box"""
+    return _estimate(Antithetic(), f, box, n, chunk_size, seed, workers=workers)
+
+
+def control_variate(f, box, n, g, g_integral, chunk_size=DEFAULT_CHUNK, seed=None, workers=1, beta=None, pilot=20000):
+    """Control variate g with known integral g_integral over box. beta defaults
+    to cov(f, g) / var(g) on a pilot run of pilot extra evaluations."""
+    root = _root(seed)
+    if beta is None:
+        points = box.sample(pilot_rng(root), pilot)
+        fs, gs = np.asarray(f(*points), dtype=float), np.asarray(g(*points), dtype=float)
+        beta = float(np.cov(fs, gs)[0, 1] / np.var(gs, ddof=1)) if np.var(gs) > 0 else 0.0
+    result = _estimate(ControlVariate(g, g_integral, beta), f, box, n, chunk_size, root, workers=workers)
+    result["beta"] = beta
+    result["pilot_samples"] = pilot
+    return result
+
+
+def stratified(f, box, n, chunk_size=DEFAULT_CHUNK, seed=None, workers=1, strata_per_dim=None):
+    """Stratified sampling on an equal grid with one point per cell per sweep.
+    By default the grid has about 1024 cells (and at most n / 8, so there are
+    enough sweeps for a standard error)."""
+    if strata_per_dim is None:
+        cells = max(1, min(1024, n // 8))
+        strata_per_dim = max(1, int(cells ** (1 / box.dim)))
+    return _estimate(Stratified(strata_per_dim, box.dim), f, box, n, chunk_size, seed, workers=workers)
+
+
+def latin_hypercube(f, box, n, chunk_size=DEFAULT_CHUNK, seed=None, workers=1, points=None):
+    """Latin hypercube replicates of points points each (default: n / 16,
+    at most 4096, so there are several replicates for a standard error)"""
+    points = points or max(2, min(4096, n // 16))
+    return _estimate(LatinHypercube(points), f, box, n, chunk_size, seed, workers=workers)
+
+
+def quasi_monte_carlo(f, box, n, chunk_size=DEFAULT_CHUNK, seed=None, workers=1, sequence="sobol", replicas=16):
+    """Randomized quasi-Monte Carlo with a "sobol", "halton" or "r2" sequence:
+    about replicas independent randomizations of n / replicas points each
+    (rounded down to a power of two for Sobol, whose nets need it). f may
+    also be a 0/1 predicate, as in area(). For smooth f the error falls
+    almost as 1/n instead of 1/sqrt(n)."""
+    points = max(1, n // replicas)
+    if sequence == "sobol":
+        points = 1 << (points.bit_length() - 1)
+    estimator = QuasiRandom(quasi_random.SEQUENCES[sequence](box.dim), points)
+    return _estimate(estimator, f, box, n, chunk_size, seed, workers=workers)
+
+
+def adaptive(
+    estimator,
+    func,
+    box,
+    abs_tol=None,
+    rel_tol=None,
+    confidence=0.95,
+    first_batch=10_000,
+    growth=2.0,
+    min_samples=10_000,
+    max_samples=None,
+    max_seconds=None,
+    chunk_size=DEFAULT_CHUNK,
+    seed=None,
+    workers=1,
+):
+    """Sample in growing batches until the confidence interval is narrow enough.
+
+    estimator is one of the estimator objects above (SampleMean(),
+    Stratified(8, 2), ...). Stops once the half-width of the confidence
+    interval is at most abs_tol, or at most rel_tol * |estimate| (either
+    target suffices), but never before min_samples; or when max_samples or
+    max_seconds is reached. rel_tol alone needs one of those caps: near a
+    zero integral the relative target may never be met. Samples come in
+    blocks of min(chunk_size, first_batch, max_samples), drawn from the
+    same per-block streams as a fixed-size run with that chunk_size
+    (returned as "chunk_size"), and each batch is about growth times all
+    samples so far, so the check costs little and the overshoot is bounded.
+
+    Returns the usual result dict plus "ci" (low, high), "half_width",
+    "converged", "reason" and a "trace" of (samples, estimate, half_width,
+    seconds) after every batch.
+    """
+    if abs_tol is None and rel_tol is None and max_samples is None and max_seconds is None:
+        raise ValueError("give an error target (abs_tol or rel_tol) or a cap (max_samples or max_seconds)")
+    if abs_tol is None and max_samples is None and max_seconds is None:
+        raise ValueError("rel_tol alone may never be met for an integral near zero; give max_samples or max_seconds")
+    start = time.perf_counter()
+    root = _root(seed)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    block = _block_size(estimator, min(chunk_size, max(first_batch, 1), max_samples or chunk_size))
+    if max_samples is not None and max_samples < block:
+        raise ValueError(f"max_samples must cover at least one contribution ({estimator.per_value} samples)")
+    scale = estimator.scale(box)
+    moments = RunningMoments()
+    trace = []
+    done = 0
+    batch = max(1, -(-first_batch // block))
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers != 1 else None
+    try:
+        while True:
+            if max_samples is not None:
+                batch = min(batch, (max_samples - done * block) // block)
+                if batch <= 0:
+                    reason = "max_samples"
+                    break
+            parts = _run_range(pool, workers, estimator, func, box, (done + batch) * block, block, root, done, done + batch, 0)
+            _reduce(parts, moments, None)
+            done += batch
+            estimate = scale * moments.mean
+            half = z * scale * moments.std_error if moments.count > 1 else float("inf")
+            seconds = time.perf_counter() - start
+            trace.append((moments.count * estimator.per_value, estimate, half, seconds))
+
+            if moments.count * estimator.per_value >= min_samples and (
+                (abs_tol is not None and half <= abs_tol) or (rel_tol is not None and half <= rel_tol * abs(estimate))
+            ):
+                reason = "converged"
+                break
+            if max_seconds is not None and seconds >= max_seconds:
+                reason = "max_seconds"
+                break
+            # Next batch: enough to bring the total to about growth times the
+            # current one, but no more than the half-width (which shrinks as
+            # 1/sqrt(n)) says the target needs, or than fits in the time left
+            batch = done * (growth - 1)
+            target = min(t for t in (abs_tol, rel_tol and rel_tol * abs(estimate)) if t is not None) if abs_tol or rel_tol else 0
+            if target and np.isfinite(half):
+                batch = min(batch, done * ((half / target) ** 2 * 1.05 - 1))
+            if max_seconds is not None:
+                batch = min(batch, done * (max_seconds - seconds) / seconds)
+            batch = max(1, int(np.ceil(batch)))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    result = _result(estimator, moments, box, None, root, time.perf_counter() - start)
+    half = trace[-1][2] if trace else float("inf")
+    result.update(
+        {
+            "ci": (result["estimate"] - half, result["estimate"] + half),
+            "half_width": half,
+            "confidence": confidence,
+            "converged": reason == "converged",
+            "reason": reason,
+            "chunk_size": block,
+            "trace": trace,
+        }
+    )
+    return result
+
+
+# The integrals in this repo as (estimator, integrand or predicate, box, exact value)
+def _exp_curve(x, y):
+    return y <= 2 * np.exp(x)
+
+
+def _circle(x, y):
+    return x**2 + y**2 <= 4
+
+
+def _gaussian_curve(x, y):
+    return y <= np.exp(-(x**2))
+
+
+PROBLEMS = {
+    # area-under-exponential-curve.py: the box starts at y = f(0) = 2
+    "exp-curve": (area, _exp_curve, Box([0, 2], [10, 2 * np.exp(10)]), 2 * (np.exp(10) - 1) - 2 * 10),
+    # area-under-the-circle.ipynb
+    "circle": (area, _circle, Box([-2, -2], [2, 2]), 4 * np.pi),
+    # major/second.ipynb
+    "gaussian": (area, _gaussian_curve, Box([-20, 0], [20, 1]), np.sqrt(np.pi)),
+}
+
+
+# The same integrals as integrands for the sample-mean family of estimators,
+# with a control variate for each: (f, box, (g, integral of g over box))
+def _exp_integrand(x):
+    return 2 * np.exp(x) - 2
+
+
+def _exp_control(x):
+    return x**8
+
+
+def _circle_indicator(x, y):
+    return (x**2 + y**2 <= 4).astype(float)
+
+
+def _circle_control(x, y):
+    return x**2 + y**2
+
+
+def _gaussian(x):
+    return np.exp(-(x**2))
+
+
+def _cauchy(x):
+    return 1 / (1 + x**2)
+
+
+INTEGRANDS = {
+    "exp-curve": (_exp_integrand, Box(0, 10), (_exp_control, 10**9 / 9)),
+    "circle": (_circle_indicator, Box([-2, -2], [2, 2]), (_circle_control, 128 / 3)),
+    "gaussian": (_gaussian, Box(-20, 20), (_cauchy, 2 * np.arctan(20))),
+}
+
+
+def compare_estimators(budgets=(10**4, 10**5, 10**6), repeats=20, problems=None):
+    """RMS error against the exact value, mean reported standard error and
+    mean wall time of every estimator on every integral, over repeats seeds.
+    "efficiency" is 1 / (rms^2 * seconds) relative to hit-or-miss: how much
+    less time the estimator needs for the same error."""
+    rows = []
+    for name in problems or INTEGRANDS:
+        f, box, (g, g_integral) = INTEGRANDS[name]
+        _, inside, area_box, exact = PROBLEMS[name]
+        methods = {
+            "hit-or-miss": lambda n, seed: area(inside, area_box, n, seed=seed),
+            "sample-mean": lambda n, seed: integrate(f, box, n, seed=seed),
+            "importance": lambda n, seed: importance(f, box, n, seed=seed),
+            "stratified": lambda n, seed: stratified(f, box, n, seed=seed),
+            "latin-hypercube": lambda n, seed: latin_hypercube(f, box, n, seed=seed),
+            "antithetic": lambda n, seed: antithetic(f, box, n, seed=seed),
+            "control-variate": lambda n, seed: control_variate(f, box, n, g, g_integral, seed=seed),
+            "sobol": lambda n, seed: quasi_monte_carlo(f, box, n, seed=seed),
+            "halton": lambda n, seed: quasi_monte_carlo(f, box, n, seed=seed, sequence="halton"),
+            "r2": lambda n, seed: quasi_monte_carlo(f, box, n, seed=seed, sequence="r2"),
+        }
+        for n in budgets:
+            baseline = None
+            for method, run in methods.items():
+                results = [run(n, seed) for seed in range(repeats)]
+                rms = float(np.sqrt(np.mean([(r["estimate"] - exact) ** 2 for r in results])))
+                seconds = float(np.mean([r["seconds"] for r in results]))
+                score = 1 / (rms**2 * seconds) if rms > 0 else float("inf")
+                baseline = baseline or score
+                rows.append(
+                    {
+                        "problem": name,
+                        "samples": n,
+                        "method": method,
+                        "rms_error": rms,
+                        "relative_error": rms / abs(exact),
+                        "mean_std_error": float(np.mean([r["std_error"] for r in results])),
+                        "seconds": seconds,
+                        "efficiency": score / baseline,
+                    }
+                )
+    return rows
+
+
+def benchmark_workers(samples=2e8, chunk_size=DEFAULT_CHUNK, seed=0):
+    """Throughput of every problem for 1, 2, 4, ... workers, checking the
+    estimates are bit-identical"""
+    counts = [1]
+    while counts[-1] * 2 <= (os.cpu_count() or 1):
+        counts.append(counts[-1] * 2)
+    if counts[-1] != (os.cpu_count() or 1):
+        counts.append(os.cpu_count())
+    for name, (estimator, func, box, _) in PROBLEMS.items():
+        baseline = None
+        for workers in counts:
+            result = estimator(func, box, int(samples), chunk_size, seed, workers=workers)
+            rate = result["samples"] / result["seconds"]
+            baseline = baseline or (result, rate)
+            same = result["estimate"] == baseline[0]["estimate"] and result["std_error"] == baseline[0]["std_error"]
+            print(
+                f"{name:<10} workers {workers:>3}  {rate / 1e6:8.1f} M samples/s  "
+                f"speedup {rate / baseline[1]:5.2f}  identical {same}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming Monte Carlo integration of the repo's integrals")
+    parser.add_argument("--problem", choices=PROBLEMS, default="circle")
+    parser.add_argument("--samples", type=float, default=1e8)
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK, help="samples per chunk; sets peak memory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="processes; 0 for every core")
+    parser.add_argument("--bench-workers", action="store_true", help="measure scaling with the worker count")
+    parser.add_argument("--compare", action="store_true", help="compare error and wall time of every estimator")
+    parser.add_argument("--repeats", type=int, default=20, help="seeds per estimator for --compare")
+    parser.add_argument("--tol", type=float, help="stop at this absolute confidence-interval half-width")
+    parser.add_argument("--rel-tol", type=float, help="stop at this half-width relative to the estimate")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--max-seconds", type=float, help="wall-time cap for --tol / --rel-tol runs")
+    parser.add_argument(
+        "--method",
+        choices=("hit-or-miss", "sample-mean", "antithetic", "stratified", "latin-hypercube", "sobol", "halton", "r2"),
+        default="hit-or-miss",
+        help="estimator for --tol / --rel-tol runs",
+    )
+    parser.add_argument(
+        "--sequence",
+        choices=quasi_random.SEQUENCES,
+        help="randomized quasi-Monte Carlo with this sequence instead of pseudo-random points",
+    )
+    parser.add_argument("--replicas", type=int, default=16, help="randomized replicas for --sequence")
+    args = parser.parse_args()
+
+    if args.compare:
+        print(f"{'problem':<10} {'samples':>8} {'method':<16} {'rms error':>11} {'rel error':>10} {'mean s.e.':>11} {'ms':>8} {'efficiency':>10}")
+        for row in compare_estimators(repeats=args.repeats):
+            print(
+                f"{row['problem']:<10} {row['samples']:>8} {row['method']:<16} {row['rms_error']:>11.4g} "
+                f"{row['relative_error']:>10.2e} {row['mean_std_error']:>11.4g} {row['seconds'] * 1000:>8.2f} "
+                f"{row['efficiency']:>10.3g}"
+            )
+        return
+    if args.bench_workers:
+        benchmark_workers(args.samples, args.chunk, args.seed)
+        return
+    if args.tol is not None or args.rel_tol is not None:
+        if args.method == "hit-or-miss":
+            _, func, box, exact = PROBLEMS[args.problem]
+            estimator = HitOrMiss()
+        else:
+            func, box, _ = INTEGRANDS[args.problem]
+            exact = PROBLEMS[args.problem][3]
+            estimator = {
+                "sample-mean": SampleMean(),
+                "antithetic": Antithetic(),
+                "stratified": Stratified(int(1024 ** (1 / box.dim)), box.dim),
+                "latin-hypercube": LatinHypercube(1024),
+                "sobol": QuasiRandom(quasi_random.Sobol(box.dim), 4096),
+                "halton": QuasiRandom(quasi_random.Halton(box.dim), 4096),
+                "r2": QuasiRandom(quasi_random.Kronecker(box.dim), 4096),
+            }[args.method]
+        try:
+            result = adaptive(
+                estimator, func, box, args.tol, args.rel_tol, args.confidence,
+                max_samples=int(args.samples), max_seconds=args.max_seconds, chunk_size=args.chunk,
+                seed=args.seed, workers=args.workers or None,
+            )
+        except ValueError as error:
+            parser.error(str(error))
+        for samples, estimate, half, seconds in result["trace"]:
+            print(f"{samples:>14,} samples  {estimate:.8g} +/- {half:.3g}  {seconds:.3f}s")
+        low, high = result["ci"]
+        print(f"{args.problem} ({args.method}): {result['estimate']:.8g}, {result['confidence']:.0%} CI {low:.8g} - {high:.8g}")
+        print(f"stopped: {result['reason']} after {result['samples']:,} samples in {result['seconds']:.2f}s (exact {exact:.8g})")
+        return
+    estimator, func, box, exact = PROBLEMS[args.problem]
+    if args.sequence:
+        result = quasi_monte_carlo(
+            func, box, int(args.samples), args.chunk, args.seed, args.workers or None, args.sequence, args.replicas
+        )
+    else:
+        result = estimator(func, box, int(args.samples), args.chunk, args.seed, workers=args.workers or None)
+    print(f"{args.problem}: {result['estimate']:.6f} +/- {result['std_error']:.6f}  (exact {exact:.6f})")
+    summary = f"{result['samples']:,} samples in {result['seconds']:.2f}s"
+    try:
+        import resource  # Unix only
+    except ImportError:
+        print(summary)
+    else:
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{summary}, peak RSS {peak_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
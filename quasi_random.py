@@ -0,0 +1,294 @@
+import argparse
+import time
+
+import numpy as np
+
+# Low-discrepancy point sets for the integration scripts.
+#
+# Pseudo-random points leave gaps and clumps, so Monte Carlo error falls only
+# as 1/sqrt(n). These sequences fill the unit cube evenly by construction and,
+# for smooth integrands, the error falls almost as 1/n:
+#     Sobol:      base-2 digital sequence from Joe and Kuo's direction numbers
+#     Halton:     radical inverses in the first dim primes
+#     Kronecker:  frac(i * alpha); the default alpha is Roberts' R2 lattice
+#
+# Every sequence is a pure function of the point index: points(start, count)
+# gives points start .. start+count-1 as a (dim, count) array in one vectorized
+# pass, so any index range can be generated without the points before it and
+# workers can split one sequence into disjoint ranges. random(size) walks the
+# sequence like a Generator, so a sequence can stand in for rng in code that
+# calls rng.random((dim, n)), e.g. monte_carlo.Box.sample.
+#
+# A plain sequence is deterministic, which gives no error estimate.
+# randomized(rng) returns an independent random copy whose every point is
+# uniform on the cube while the set stays low-discrepancy (Sobol: linear
+# matrix scramble plus digital shift; Halton: random digit permutations;
+# Kronecker: random shift). The mean over a few such replicas is unbiased and
+# their spread gives the standard error.
+
+BITS = 32
+
+# Joe and Kuo (2008), new-joe-kuo-6.21201: (degree s, coefficients a, initial
+# m_1 .. m_s) of the primitive polynomial for dimensions 2, 3, ...; dimension 1
+# is the van der Corput sequence
+JOE_KUO = [
+    (1, 0, (1,)),
+    (2, 1, (1, 3)),
+    (3, 1, (1, 3, 1)),
+    (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)),
+    (5, 2, (1, 1, 5, 5, 17)),
+    (5, 4, (1, 1, 5, 5, 5)),
+    (5, 7, (1, 1, 7, 11, 19)),
+    (5, 11, (1, 1, 5, 1, 1)),
+    (5, 13, (1, 1, 1, 3, 11)),
+    (5, 14, (1, 3, 5, 5, 31)),
+    (6, 1, (1, 3, 3, 9, 7, 49)),
+    (6, 13, (1, 1, 1, 15, 21, 21)),
+    (6, 16, (1, 3, 1, 13, 27, 49)),
+    (6, 19, (1, 1, 1, 15, 7, 5)),
+    (6, 22, (1, 3, 1, 15, 13, 25)),
+    (6, 25, (1, 1, 5, 5, 19, 61)),
+    (7, 1, (1, 3, 7, 11, 23, 15, 103)),
+    (7, 4, (1, 3, 7, 13, 13, 15, 69)),
+]
+
+
+class Sequence:
+    """Shared walking and checking; subclasses define points() and randomized()"""
+
+    def __init__(self, dim):
+        self.dim = dim
+        self.index = 0  # next point random() hands out; set it to skip ahead
+
+    def points(self, start, count):
+        """Points start .. start+count-1 as a (dim, count) array in [0, 1)"""
+        raise NotImplementedError
+
+    def randomized(self, rng):
+        """An independent random copy of the sequence"""
+        raise NotImplementedError
+
+    def random(self, size):
+        """The next n points as (dim, n); size is n or (dim, n)"""
+        dim, count = (self.dim, size) if np.ndim(size) == 0 else size
+        if dim != self.dim:
+            raise ValueError(f"this sequence has {self.dim} dimensions, not {dim}")
+        unit = self.points(self.index, count)
+        self.index += count
+        return unit
+
+
+def _sobol_directions(dim):
+    """(dim, BITS) direction numbers, scaled to BITS-bit integers"""
+    if dim > len(JOE_KUO) + 1:
+        raise ValueError(f"Sobol direction numbers are tabulated for up to {len(JOE_KUO) + 1} dimensions")
+    directions = np.zeros((dim, BITS), dtype=np.uint64)
+    directions[0] = [1 << (BITS - 1 - k) for k in range(BITS)]
+    for d, (s, a, m) in enumerate(JOE_KUO[: dim - 1], start=1):
+        v = [m[k] << (BITS - 1 - k) for k in range(s)]
+        for k in range(s, BITS):
+            value = v[k - s] ^ (v[k - s] >> s)
+            for l in range(1, s):
+                if (a >> (s - 1 - l)) & 1:
+                    value ^= v[k - l]
+            v.append(value)
+        directions[d] = v
+    return directions
+
+
+class Sobol(Sequence):
+    """Sobol sequence in up to 21 dimensions and 2**32 points. Its first
+    2**m points (and every aligned run of 2**m) are a (t, m, dim)-net, so
+    sample sizes that are powers of two integrate best."""
+
+    def __init__(self, dim, scramble=False, seed=None, directions=None, shift=None):
+        super().__init__(dim)
+        self.directions = _sobol_directions(dim) if directions is None else directions
+        self.shift = np.zeros(dim, dtype=np.uint64) if shift is None else shift
+        if scramble:
+            scrambled = self.randomized(np.random.default_rng(seed))
+            self.directions, self.shift = scrambled.directions, scrambled.shift
+
+    def points(self, start, count):
+        if start + count > 1 << BITS:
+            raise ValueError(f"Sobol points are limited to indices below 2**{BITS}")
+        bits = np.empty((self.dim, count), dtype=np.uint64)
+        if count == 0:
+            return bits.astype(float)
+        # Point i is the XOR of the directions picked by the Gray code of i;
+        # after the first point, each next one flips a single direction, the
+        # one at the lowest set bit of i, so the block is one running XOR
+        gray = start ^ (start >> 1)
+        picked = [k for k in range(BITS) if (gray >> k) & 1]
+        bits[:, 0] = np.bitwise_xor.reduce(self.directions[:, picked], axis=1) ^ self.shift
+        if count > 1:
+            index = np.arange(start + 1, start + count, dtype=np.uint64)
+            lowest = index & (~index + np.uint64(1))
+            bits[:, 1:] = self.directions[:, np.frexp(lowest.astype(float))[1] - 1]
+            np.bitwise_xor.accumulate(bits, axis=1, out=bits)
+        return bits.astype(float) * 2.0**-BITS
+
+    def randomized(self, rng):
+        # Linear matrix scramble: every direction number's digits go through a
+        # random lower-triangular binary matrix with unit diagonal, which keeps
+        # the net structure; then a random digital shift makes each point uniform
+        powers = np.uint64(1) << np.arange(BITS - 1, -1, -1, dtype=np.uint64)
+        digits = ((self.directions[:, :, None] & powers) > 0).astype(np.int64)
+        lower = np.tril(rng.integers(0, 2, (self.dim, BITS, BITS)), -1) + np.eye(BITS, dtype=np.int64)
+        scrambled = (digits @ lower.transpose(0, 2, 1)) & 1
+        directions = (scrambled.astype(np.uint64) * powers).sum(axis=2, dtype=np.uint64)
+        shift = rng.integers(0, 1 << BITS, self.dim, dtype=np.uint64)
+        return Sobol(self.dim, directions=directions, shift=shift)
+
+
+def _primes(count):
+    primes = []
+    candidate = 2
+    while len(primes) < count:
+        if all(candidate % p for p in primes if p * p <= candidate):
+            primes.append(candidate)
+        candidate += 1
+    return primes
+
+
+class Halton(Sequence):
+    """Halton sequence: coordinate d is the radical inverse of the index in
+    the d-th prime. Unscrambled, high dimensions (large primes) are strongly
+    correlated in their early points; scrambling fixes that."""
+
+    # Digits are handled a group at a time: one divmod by base**group and a
+    # lookup of the group's (permuted) radical inverse replace group divmods
+    TABLE_BITS = 12
+
+    def __init__(self, dim, scramble=False, seed=None, permutations=None):
+        super().__init__(dim)
+        self.bases = _primes(dim)
+        self.permutations = permutations
+        if scramble and permutations is None:
+            self.permutations = self.randomized(np.random.default_rng(seed)).permutations
+        self.tables = [self._digit_tables(d) for d in range(dim)]
+
+    def _digit_tables(self, d):
+        """(radix, radical inverse of every group of digits) per group position"""
+        base = self.bases[d]
+        group = max(1, int(self.TABLE_BITS * np.log(2) / np.log(base)))
+        # Unscrambled, every group has the same table
+        permutations = [np.arange(base)] * group if self.permutations is None else self.permutations[d]
+        tables = []
+        for first in range(0, len(permutations), group):
+            # Built from the last digit of the group back: the index is
+            # digit + base * (rest), so each step is an outer sum
+            table = np.zeros(1)
+            for permutation in reversed(permutations[first : first + group]):
+                table = ((table[:, None] + permutation[None, :]) / base).ravel()
+            tables.append((len(table), table))
+        return tables
+
+    def points(self, start, count):
+        index = np.arange(start, start + count, dtype=np.int64)
+        unit = np.zeros((self.dim, count))
+        for d, tables in enumerate(self.tables):
+            remaining = index.copy()
+            scale = 1.0
+            if self.permutations is None:
+                radix, table = tables[0]
+                while remaining.any():
+                    remaining, digits = np.divmod(remaining, radix)
+                    unit[d] += table[digits] * scale
+                    scale /= radix
+            else:
+                # Permuted digits are nonzero beyond the last digit of the
+                # index too, so all BITS bits' worth of digits are used
+                for radix, table in tables:
+                    remaining, digits = np.divmod(remaining, radix)
+                    unit[d] += table[digits] * scale
+                    scale /= radix
+        return unit
+
+    def randomized(self, rng):
+        # An independent random permutation of the digits at every position
+        # and in every dimension (random-permutation scrambling)
+        permutations = [
+            rng.permuted(np.tile(np.arange(base), (int(np.ceil(BITS * np.log(2) / np.log(base))), 1)), axis=1)
+            for base in self.bases
+        ]
+        return Halton(self.dim, permutations=permutations)
+
+
+def r2_alpha(dim):
+    """Roberts' R2 generators: powers of 1 / phi_dim, where phi_dim is the
+    positive root of x**(dim + 1) = x + 1 (the golden ratio for dim 1)"""
+    phi = 2.0
+    for _ in range(64):
+        phi = (1 + phi) ** (1 / (dim + 1))
+    return (1 / phi) ** np.arange(1, dim + 1)
+
+
+class Kronecker(Sequence):
+    """Kronecker lattice frac(shift + i * alpha), with the R2 alpha by default.
+    Coordinates are kept as 64-bit fixed point so i * alpha wraps exactly
+    instead of losing the fraction to float rounding at large i."""
+
+    def __init__(self, dim, scramble=False, seed=None, alpha=None, shift=None):
+        super().__init__(dim)
+        alpha = r2_alpha(dim) if alpha is None else np.asarray(alpha, dtype=float)
+        self.alpha = np.array([int(a % 1 * 2.0**53) << 11 for a in alpha], dtype=np.uint64)
+        self.shift = np.zeros(dim, dtype=np.uint64) if shift is None else shift
+        if scramble:
+            self.shift = self.randomized(np.random.default_rng(seed)).shift
+
+    def points(self, start, count):
+        index = np.arange(start, start + count, dtype=np.uint64)
+        fixed = index[None, :] * self.alpha[:, None] + self.shift[:, None]
+        return (fixed >> np.uint64(11)).astype(float) * 2.0**-53
+
+    def randomized(self, rng):
+        # Cranley-Patterson rotation: one uniform shift for all points
+        copy = Kronecker(self.dim, shift=rng.integers(0, 2**64, self.dim, dtype=np.uint64, endpoint=False))
+        copy.alpha = self.alpha
+        return copy
+
+
+SEQUENCES = {"sobol": Sobol, "halton": Halton, "r2": Kronecker}
+
+
+def benchmark_sequences(count=1 << 22, dim=2, parts=8):
+    """Points per second of every sequence, plain and randomized, checking
+    that disjoint index ranges concatenate to the single-range block"""
+    rng = np.random.default_rng(0)
+    for name, cls in SEQUENCES.items():
+        for label, sequence in (("plain", cls(dim)), ("randomized", cls(dim).randomized(rng))):
+            start = time.perf_counter()
+            whole = sequence.points(0, count)
+            elapsed = time.perf_counter() - start
+            bounds = np.linspace(0, count, parts + 1).astype(int)
+            pieces = np.concatenate([sequence.points(low, high - low) for low, high in zip(bounds[:-1], bounds[1:])], axis=1)
+            print(
+                f"{name:<7} {label:<11} {count / elapsed / 1e6:8.1f} M points/s  "
+                f"ranges identical {np.array_equal(whole, pieces)}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Low-discrepancy sequences")
+    parser.add_argument("--sequence", choices=SEQUENCES, default="sobol")
+    parser.add_argument("--dim", type=int, default=2)
+    parser.add_argument("--start", type=int, default=0, help="index of the first point")
+    parser.add_argument("--count", type=int, default=8)
+    parser.add_argument("--scramble", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bench", action="store_true", help="measure generation speed")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark_sequences(dim=args.dim)
+        return
+    sequence = SEQUENCES[args.sequence](args.dim, args.scramble, args.seed)
+    for i, point in enumerate(sequence.points(args.start, args.count).T, start=args.start):
+        print(f"{i:>8}  " + "  ".join(f"{x:.6f}" for x in point))
+
+
+if __name__ == "__main__":
+    main()
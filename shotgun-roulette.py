@@ -1,19 +1,37 @@
+import argparse
+import contextlib
+import io
 import random
 import time
 import os
 
+import shotgun_roulette_solver as solver
+
+MAX_PASSES = 2
+
 
 def clear_screen():
-    os.system("cls" if os.name == "nt" else "clear")
+    if os.name == "nt":
+        os.system("cls")
+    else:
+        # Home the cursor and clear in-process instead of spawning `clear`
+        print("\x1b[H\x1b[2J", end="", flush=True)
 
 
 class ShotgunRoulette:
-    def __init__(self):
+    def __init__(self, ask=input, delay=1.0):
+        # ask reads the player's choices and delay paces the output; the
+        # round check below replaces both to play headlessly
+        self.ask = ask
+        self.delay = delay
         self.shells = ["empty"] * 5 + ["loaded"]
         random.shuffle(self.shells)
         self.player_score = 0
         self.computer_score = 0
         self.round = 1
+        self.passes = 0
+        # table[shells fired][passes in a row][next shell loaded] -> pull?
+        self.policy_table = solver.optimal_policy_table(max_passes=MAX_PASSES)
 
     def display_status(self):
         print("\n" + "=" * 50)
@@ -24,19 +42,29 @@ class ShotgunRoulette:
 
     def player_turn(self):
         print("\nYour turn!")
-        choice = input(
+        # As in the solver's model, after MAX_PASSES passes in a row the side
+        # to act must pull, so every round ends
+        can_pass = self.passes < MAX_PASSES
+        choice = self.ask(
             "What would you like to do? (1: Check chamber, 2: Pass to computer, 3: Pull trigger): "
+            if can_pass
+            else "You must pull this turn. (1: Check chamber, 3: Pull trigger): "
         )
 
         if choice == "1":
             print(f"\nThe chamber is {self.shells[0]}")
             return self.player_turn()
+        elif choice == "2" and not can_pass:
+            print(f"\nNo more passing: after {MAX_PASSES} passes in a row you must pull the trigger!")
+            return self.player_turn()
         elif choice == "2":
             print("\nYou passed to the computer!")
+            self.passes += 1
             return self.computer_turn()
         elif choice == "3":
             print("\nYou pull the trigger...")
-            time.sleep(1)
+            self.passes = 0
+            time.sleep(self.delay)
 
             if self.shells[0] == "loaded":
                 print("BANG! You lose this round!")
@@ -52,13 +80,17 @@ class ShotgunRoulette:
 
     def computer_turn(self):
         print("\nComputer's turn...")
-        time.sleep(1)
-
-        # Simple AI: If first chamber is loaded and was checked, always pass
-        # Otherwise, 70% chance to pull trigger
-        if random.random() < 0.7:
+        time.sleep(self.delay)
+
+        # Checking is free, so the computer always checks and then plays the
+        # precomputed optimal decision; the table's last passes row is the
+        # forced pull, which the player is held to as well
+        print("Computer checks the chamber...")
+        fired = 6 - len(self.shells)
+        if self.policy_table[fired][self.passes][self.shells[0] == "loaded"]:
             print("Computer pulls the trigger...")
-            time.sleep(1)
+            self.passes = 0
+            time.sleep(self.delay)
 
             if self.shells[0] == "loaded":
                 print("BANG! Computer loses this round!")
@@ -70,11 +102,13 @@ class ShotgunRoulette:
                 return True
         else:
             print("Computer passes back to you!")
+            self.passes += 1
             return self.player_turn()
 
     def play_round(self):
         self.shells = ["empty"] * 5 + ["loaded"]
         random.shuffle(self.shells)
+        self.passes = 0
 
         print(f"\nRound {self.round} begins!")
         print("The chamber has been loaded and shuffled...")
@@ -102,7 +136,8 @@ class ShotgunRoulette:
         print("   - Check the current chamber")
         print("   - Pass to the computer")
         print("   - Pull the trigger")
-        print("3. First to 3 points wins")
+        print(f"3. After {MAX_PASSES} passes in a row, the next side must pull")
+        print("4. First to 3 points wins")
         print("\nPress Enter to start...")
         input()
 
@@ -123,6 +158,28 @@ class ShotgunRoulette:
         )
 
 
+def check_rounds_end(rounds=1000, seed=0):
+    """Play rounds headlessly against a player who checks and passes a loaded
+    shell whenever allowed; every round must end, and with the forced pull
+    that player must win some of them"""
+    random.seed(seed)
+    game = ShotgunRoulette(delay=0)
+    game.ask = lambda prompt: "2" if "2: Pass" in prompt and game.shells[0] == "loaded" else "3"
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(rounds):
+            game.play_round()
+    assert game.player_score + game.computer_score == rounds, "a round ended without a loser"
+    assert game.player_score > 0, "the computer never lost a round"
+    return game.player_score, game.computer_score
+
+
 if __name__ == "__main__":
-    game = ShotgunRoulette()
-    game.play_game()
+    parser = argparse.ArgumentParser(description="Shotgun Roulette against the computer")
+    parser.add_argument("--check", action="store_true", help="play many rounds headlessly and check each one ends")
+    args = parser.parse_args()
+    if args.check:
+        player, computer = check_rounds_end()
+        print(f"all rounds ended: player won {player}, computer won {computer}")
+    else:
+        game = ShotgunRoulette()
+        game.play_game()
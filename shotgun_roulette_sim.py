@@ -0,0 +1,172 @@
+import argparse
+import time
+
+import numpy as np
+
+# Headless, vectorized version of the rules in shotgun-roulette.py. A round's
+# chamber is one small integer, the index of the loaded shell (the shells
+# before it are empty), plus the number of shells already fired. Thousands
+# of rounds advance together as NumPy arrays.
+#
+# A turn is: optionally check the next shell (private, free), then pull or
+# pass. A pass hands the turn over without firing; a safe pull fires one
+# shell and hands the turn over; pulling the loaded shell loses the round.
+# After max_passes passes in a row the player to act must pull, so rounds
+# always end. A game is first to 3 rounds.
+
+SHELLS = 6
+PLAYER, COMPUTER = 0, 1
+POINTS_TO_WIN = 3
+
+
+class Policy:
+    """Chooses how likely the side to act is to pull the trigger.
+
+    known is 1 if the side checked and the next shell is loaded, 0 if it
+    checked and it is empty, and -1 if it did not check.
+    """
+
+    checks = False
+
+    def pull_probability(self, remaining, passes, known):
+        raise NotImplementedError
+
+
+class RandomPull(Policy):
+    """The computer's current rule: pull with a fixed probability, never check"""
+
+    def __init__(self, p=0.7):
+        self.p = p
+
+    def pull_probability(self, remaining, passes, known):
+        return np.full(len(remaining), self.p)
+
+
+class AlwaysPull(RandomPull):
+    def __init__(self):
+        super().__init__(1.0)
+
+
+class CheckThenDecide(Policy):
+    """Check the chamber, pull if it is empty and pass if it is loaded"""
+
+    checks = True
+
+    def pull_probability(self, remaining, passes, known):
+        return (known == 0).astype(float)
+
+
+POLICIES = {
+    "seventy": RandomPull,
+    "always": AlwaysPull,
+    "check": CheckThenDecide,
+}
+
+
+def simulate_rounds(player, computer, n, rng, max_passes=2):
+    """Play n independent rounds; returns the loser of each (PLAYER or COMPUTER)"""
+    loaded = rng.integers(0, SHELLS, n)
+    fired = np.zeros(n, dtype=np.int64)
+    passes = np.zeros(n, dtype=np.int64)
+    turn = rng.integers(0, 2, n)  # each round starts with a coin flip
+    loser = np.full(n, -1, dtype=np.int64)
+
+    active = np.arange(n)
+    while active.size:
+        side = turn[active]
+        fired_now = fired[active]
+        passes_now = passes[active]
+        is_loaded = fired_now == loaded[active]
+
+        pull_p = np.empty(active.size)
+        for who, policy in ((PLAYER, player), (COMPUTER, computer)):
+            mine = side == who
+            if mine.any():
+                known = is_loaded[mine].astype(np.int64) if policy.checks else np.full(mine.sum(), -1)
+                pull_p[mine] = policy.pull_probability(SHELLS - fired_now[mine], passes_now[mine], known)
+        pull = (rng.random(active.size) < pull_p) | (passes_now >= max_passes)
+
+        bang = pull & is_loaded
+        loser[active[bang]] = side[bang]
+        fired[active[pull & ~is_loaded]] += 1
+        passes[active] = np.where(pull, 0, passes_now + 1)
+        survivors = active[~bang]
+        turn[survivors] ^= 1
+        active = survivors
+    return loser
+
+
+def simulate_games(player, computer, n, rng, max_passes=2):
+    """Play n first-to-3 games; returns (player won, rounds played) arrays.
+
+    Rounds are independent, so a first-to-3 game is decided by the majority
+    of five rounds; the rounds after the third win are simply never played.
+    """
+    rounds = 2 * POINTS_TO_WIN - 1
+    player_won_round = simulate_rounds(player, computer, n * rounds, rng, max_passes).reshape(n, rounds) == COMPUTER
+    player_points = np.cumsum(player_won_round, axis=1)
+    computer_points = np.arange(1, rounds + 1) - player_points
+    decided = (player_points >= POINTS_TO_WIN) | (computer_points >= POINTS_TO_WIN)
+    return player_points[:, -1] >= POINTS_TO_WIN, decided.argmax(axis=1) + 1
+
+
+def wilson_interval(successes, n, z=1.959964):
+    """Confidence interval for a binomial proportion (95% by default)"""
+    p = successes / n
+    denom = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    half = z * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return center - half, center + half
+
+
+def evaluate(player, computer, rounds=1_000_000, games=1_000_000, seed=0, batch=1 << 20, max_passes=2):
+    """Player win probabilities per round and per game, with 95% intervals"""
+    rng = np.random.default_rng(seed)
+    round_wins = 0
+    for start in range(0, rounds, batch):
+        n = min(batch, rounds - start)
+        round_wins += int(np.count_nonzero(simulate_rounds(player, computer, n, rng, max_passes) == COMPUTER))
+    game_wins = 0
+    total_rounds = 0
+    per_game_batch = max(1, batch // (2 * POINTS_TO_WIN - 1))
+    for start in range(0, games, per_game_batch):
+        n = min(per_game_batch, games - start)
+        won, played = simulate_games(player, computer, n, rng, max_passes)
+        game_wins += int(np.count_nonzero(won))
+        total_rounds += int(played.sum())
+    return {
+        "round_win": round_wins / rounds,
+        "round_win_ci": wilson_interval(round_wins, rounds),
+        "game_win": game_wins / games,
+        "game_win_ci": wilson_interval(game_wins, games),
+        "rounds_per_game": total_rounds / games,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo evaluation of Shotgun Roulette policies")
+    parser.add_argument("--player", choices=POLICIES, default="check")
+    parser.add_argument("--computer", choices=POLICIES, default="seventy")
+    parser.add_argument("--rounds", type=int, default=1_000_000)
+    parser.add_argument("--games", type=int, default=1_000_000)
+    parser.add_argument("--max-passes", type=int, default=2, help="passes in a row before a pull is forced")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = evaluate(
+        POLICIES[args.player](), POLICIES[args.computer](), args.rounds, args.games, args.seed, max_passes=args.max_passes
+    )
+    elapsed = time.perf_counter() - start
+
+    low, high = result["round_win_ci"]
+    print(f"Player ({args.player}) vs computer ({args.computer})")
+    print(f"Round win probability: {result['round_win']:.4f}  (95% CI {low:.4f} - {high:.4f})")
+    low, high = result["game_win_ci"]
+    print(f"Game win probability:  {result['game_win']:.4f}  (95% CI {low:.4f} - {high:.4f})")
+    print(f"Average rounds per game: {result['rounds_per_game']:.3f}")
+    print(f"Simulated in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
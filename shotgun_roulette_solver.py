@@ -0,0 +1,160 @@
+import argparse
+from functools import lru_cache
+
+import numpy as np
+
+import shotgun_roulette_sim as sim
+
+SHELLS = sim.SHELLS
+PLAYER, COMPUTER = sim.PLAYER, sim.COMPUTER
+POINTS_TO_WIN = sim.POINTS_TO_WIN
+
+# Exact solution of the rules in shotgun_roulette_sim.py by backward induction.
+#
+# Nobody ever sees past the next shell, and policies only react to what they
+# know about that shell, so a round is fully described by
+#     (shells fired, passes in a row, side to act, next shell loaded?)
+# When a safe pull brings a new shell to the front it is loaded with
+# probability 1 / shells remaining. A policy of None means "play optimally":
+# check (it is free and private), never pull a loaded shell unless forced,
+# and on an empty shell pull or pass, whichever wins more often.
+
+
+def _pull_probability(policy, remaining, passes, loaded):
+    known = int(loaded) if policy.checks else -1
+    return float(policy.pull_probability(np.array([remaining]), np.array([passes]), np.array([known]))[0])
+
+
+def solve_round(player=None, computer=None, max_passes=2):
+    """Return (value, decision) functions for one round.
+
+    value(fired, passes, turn, loaded) is the probability that the computer
+    wins the round from that state. decision(...) is True when an optimal
+    side to act should pull (only defined for sides whose policy is None).
+    """
+    policies = {PLAYER: player, COMPUTER: computer}
+
+    @lru_cache(maxsize=None)
+    def solve(fired, passes, turn, loaded):
+        remaining = SHELLS - fired
+        other = 1 - turn
+        # The computer's win probability after each action
+        if loaded:
+            pulled = 1.0 if turn == PLAYER else 0.0
+        elif remaining == 2:
+            pulled = solve(fired + 1, 0, other, True)[0]  # the last shell is the loaded one
+        else:
+            p_next = 1.0 / (remaining - 1)
+            pulled = p_next * solve(fired + 1, 0, other, True)[0] + (1 - p_next) * solve(fired + 1, 0, other, False)[0]
+        if passes >= max_passes:
+            return pulled, True
+        passed = solve(fired, passes + 1, other, loaded)[0]
+
+        policy = policies[turn]
+        if policy is None:
+            # The side to act maximizes its own chance of winning; on a tie it
+            # pulls an empty shell and passes a loaded one
+            gain = pulled - passed if turn == COMPUTER else passed - pulled
+            if gain > 1e-12 or (abs(gain) <= 1e-12 and not loaded):
+                return pulled, True
+            return passed, False
+        p = _pull_probability(policy, remaining, passes, loaded)
+        return p * pulled + (1 - p) * passed, None
+
+    def value(fired, passes, turn, loaded):
+        return solve(fired, passes, turn, loaded)[0]
+
+    def decision(fired, passes, turn, loaded):
+        return solve(fired, passes, turn, loaded)[1]
+
+    return value, decision
+
+
+def round_win_probability(player=None, computer=None, max_passes=2):
+    """Probability that the computer wins a round that starts on a coin flip"""
+    value, _ = solve_round(player, computer, max_passes)
+    p_loaded = 1.0 / SHELLS
+    return sum(
+        0.5 * (p_loaded * value(0, 0, turn, True) + (1 - p_loaded) * value(0, 0, turn, False))
+        for turn in (PLAYER, COMPUTER)
+    )
+
+
+def game_win_probability(player=None, computer=None, max_passes=2):
+    """Probability that the computer wins a first-to-3 game.
+
+    Rounds are independent and none of the policies look at the score, so the
+    round policy that maximizes the round win also maximizes the game win.
+    """
+    q = round_win_probability(player, computer, max_passes)
+
+    @lru_cache(maxsize=None)
+    def game(player_score, computer_score):
+        if computer_score == POINTS_TO_WIN:
+            return 1.0
+        if player_score == POINTS_TO_WIN:
+            return 0.0
+        return q * game(player_score, computer_score + 1) + (1 - q) * game(player_score + 1, computer_score)
+
+    return game(0, 0)
+
+
+def optimal_policy_table(player=None, max_passes=2):
+    """Precomputed computer decisions: table[fired][passes][loaded] is True to pull.
+
+    player is the opponent model to best-respond to; None means an optimal
+    opponent, which gives the equilibrium strategy.
+    """
+    _, decision = solve_round(player, None, max_passes)
+    # With one shell left it is always the loaded one
+    return [
+        [
+            [fired < SHELLS - 1 and decision(fired, passes, COMPUTER, False), decision(fired, passes, COMPUTER, True)]
+            for passes in range(max_passes + 1)
+        ]
+        for fired in range(SHELLS)
+    ]
+
+
+class OptimalPolicy(sim.Policy):
+    """Vectorized lookup of optimal_policy_table, usable in the simulator"""
+
+    checks = True
+
+    def __init__(self, player=None, max_passes=2):
+        table = optimal_policy_table(player, max_passes)
+        self.table = np.array(table, dtype=float)
+
+    def pull_probability(self, remaining, passes, known):
+        return self.table[SHELLS - remaining, passes, known]
+
+
+def main():
+    names = ["optimal"] + list(sim.POLICIES)
+    parser = argparse.ArgumentParser(description="Exact Shotgun Roulette win probabilities and optimal policy")
+    parser.add_argument("--player", choices=names, default="check")
+    parser.add_argument("--computer", choices=names, default="optimal")
+    parser.add_argument("--max-passes", type=int, default=2)
+    args = parser.parse_args()
+
+    def make(name):
+        return None if name == "optimal" else sim.POLICIES[name]()
+
+    player, computer = make(args.player), make(args.computer)
+    print(f"Player ({args.player}) vs computer ({args.computer})")
+    print(f"Computer round win probability: {round_win_probability(player, computer, args.max_passes):.6f}")
+    print(f"Computer game win probability:  {game_win_probability(player, computer, args.max_passes):.6f}")
+
+    if computer is None:
+        print("\nOptimal computer decisions (pull / pass) by shells fired and passes in a row:")
+        table = optimal_policy_table(player, args.max_passes)
+        for fired in range(SHELLS - 1):
+            cells = []
+            for passes in range(args.max_passes + 1):
+                empty, loaded = table[fired][passes]
+                cells.append(f"passes={passes}: empty {'pull' if empty else 'pass'}, loaded {'pull' if loaded else 'pass'}")
+            print(f"  fired {fired}: " + " | ".join(cells))
+
+
+if __name__ == "__main__":
+    main()